@@ -74,6 +74,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
@@ -115,6 +116,10 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny', 
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'BookNest.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 REST_AUTH = {
@@ -373,4 +378,8 @@ CACHES = {
 CACHE_TTL = 60 * 15
 
 # Cache key prefix
-CACHE_KEY_PREFIX = 'booknest'
\ No newline at end of file
+CACHE_KEY_PREFIX = 'booknest'
+# Worker threads shared by all outbound OpenLibrary/Google Books requests
+EXTERNAL_API_CONCURRENCY = int(os.environ.get(
+    'EXTERNAL_API_CONCURRENCY', min(32, (os.cpu_count() or 4) * 4)
+))
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-15 22:42
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0016_remove_book_external_id_remove_book_external_source'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='genre',
+            index=models.Index(django.db.models.functions.text.Upper('name'), name='genre_name_upper_idx'),
+        ),
+    ]
@@ -0,0 +1,131 @@
+from django.db import migrations
+
+# Keep book.search_vector in sync inside Postgres so searches can use the
+# GIN index on it instead of rebuilding the vector for every row per query.
+# Weights mirror the old per-request SearchVector: title/authors A,
+# description/genres B, number of pages C.
+FORWARD_SQL = """
+CREATE OR REPLACE FUNCTION book_search_vector_compute(
+    b_isbn13 varchar, b_title text, b_description text, b_pages integer
+) RETURNS tsvector LANGUAGE sql STABLE AS $$
+    SELECT setweight(to_tsvector('english', coalesce(b_title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(b_description, '')), 'B')
+        || setweight(to_tsvector('english', coalesce((
+               SELECT string_agg(a.name, ' ')
+               FROM author_books ab JOIN author a ON a.author_id = ab.author_id
+               WHERE ab.book_id = b_isbn13), '')), 'A')
+        || setweight(to_tsvector('english', coalesce((
+               SELECT string_agg(g.name, ' ')
+               FROM book_genres bg JOIN books_genre g ON g.id = bg.genre_id
+               WHERE bg.book_id = b_isbn13), '')), 'B')
+        || setweight(to_tsvector('english', coalesce(b_pages::text, '')), 'C')
+$$;
+
+CREATE OR REPLACE FUNCTION book_search_vector_refresh(b_isbn13 varchar)
+RETURNS void LANGUAGE sql AS $$
+    UPDATE book
+    SET search_vector = book_search_vector_compute(isbn13, title, description, number_of_pages)
+    WHERE isbn13 = b_isbn13
+$$;
+
+-- Book row: recompute before the row is written
+CREATE OR REPLACE FUNCTION book_search_vector_book_trigger()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := book_search_vector_compute(
+        NEW.isbn13, NEW.title, NEW.description, NEW.number_of_pages
+    );
+    RETURN NEW;
+END
+$$;
+
+CREATE TRIGGER book_search_vector_book
+BEFORE INSERT OR UPDATE OF title, description, number_of_pages ON book
+FOR EACH ROW EXECUTE FUNCTION book_search_vector_book_trigger();
+
+-- Author/genre links: refresh the affected book(s)
+CREATE OR REPLACE FUNCTION book_search_vector_link_trigger()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM book_search_vector_refresh(OLD.book_id);
+        RETURN NULL;
+    END IF;
+    PERFORM book_search_vector_refresh(NEW.book_id);
+    IF TG_OP = 'UPDATE' THEN
+        IF OLD.book_id IS DISTINCT FROM NEW.book_id THEN
+            PERFORM book_search_vector_refresh(OLD.book_id);
+        END IF;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER book_search_vector_authors
+AFTER INSERT OR UPDATE OR DELETE ON author_books
+FOR EACH ROW EXECUTE FUNCTION book_search_vector_link_trigger();
+
+CREATE TRIGGER book_search_vector_genres
+AFTER INSERT OR UPDATE OR DELETE ON book_genres
+FOR EACH ROW EXECUTE FUNCTION book_search_vector_link_trigger();
+
+-- Renamed authors/genres: refresh every book that references them
+CREATE OR REPLACE FUNCTION book_search_vector_author_trigger()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE book
+    SET search_vector = book_search_vector_compute(isbn13, title, description, number_of_pages)
+    WHERE isbn13 IN (SELECT book_id FROM author_books WHERE author_id = NEW.author_id);
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER book_search_vector_author_name
+AFTER UPDATE OF name ON author
+FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+EXECUTE FUNCTION book_search_vector_author_trigger();
+
+CREATE OR REPLACE FUNCTION book_search_vector_genre_trigger()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE book
+    SET search_vector = book_search_vector_compute(isbn13, title, description, number_of_pages)
+    WHERE isbn13 IN (SELECT book_id FROM book_genres WHERE genre_id = NEW.id);
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER book_search_vector_genre_name
+AFTER UPDATE OF name ON books_genre
+FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+EXECUTE FUNCTION book_search_vector_genre_trigger();
+
+-- Backfill existing books
+UPDATE book
+SET search_vector = book_search_vector_compute(isbn13, title, description, number_of_pages);
+"""
+
+REVERSE_SQL = """
+DROP TRIGGER IF EXISTS book_search_vector_genre_name ON books_genre;
+DROP TRIGGER IF EXISTS book_search_vector_author_name ON author;
+DROP TRIGGER IF EXISTS book_search_vector_genres ON book_genres;
+DROP TRIGGER IF EXISTS book_search_vector_authors ON author_books;
+DROP TRIGGER IF EXISTS book_search_vector_book ON book;
+DROP FUNCTION IF EXISTS book_search_vector_genre_trigger();
+DROP FUNCTION IF EXISTS book_search_vector_author_trigger();
+DROP FUNCTION IF EXISTS book_search_vector_link_trigger();
+DROP FUNCTION IF EXISTS book_search_vector_book_trigger();
+DROP FUNCTION IF EXISTS book_search_vector_refresh(varchar);
+DROP FUNCTION IF EXISTS book_search_vector_compute(varchar, text, text, integer);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0017_genre_name_upper_idx'),
+    ]
+
+    operations = [
+        migrations.RunSQL(sql=FORWARD_SQL, reverse_sql=REVERSE_SQL),
+    ]
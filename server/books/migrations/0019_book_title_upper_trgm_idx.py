@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-15 22:59
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0018_book_search_vector_triggers'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('title'), name='gin_trgm_ops'), name='book_title_upper_trgm_idx'),
+        ),
+    ]
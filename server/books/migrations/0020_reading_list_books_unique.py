@@ -0,0 +1,29 @@
+# Generated by Django 5.1.2 on 2026-10-15 23:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0019_book_title_upper_trgm_idx'),
+    ]
+
+    operations = [
+        # Drop duplicate memberships left by the old check-then-insert, keeping
+        # the earliest row, so the constraint can be created
+        migrations.RunSQL(
+            sql="""
+                DELETE FROM "Reading_List_Books" a
+                USING "Reading_List_Books" b
+                WHERE a.readinglist_id = b.readinglist_id
+                  AND a.book_id = b.book_id
+                  AND a.id > b.id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='readinglistbooks',
+            constraint=models.UniqueConstraint(fields=('readinglist', 'book'), name='uniq_rl_book'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-15 23:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0020_reading_list_books_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookrating',
+            index=models.Index(fields=['book', 'rate'], name='rating_book_rate_idx'),
+        ),
+    ]
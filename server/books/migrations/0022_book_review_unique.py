@@ -0,0 +1,35 @@
+# Generated by Django 5.1.2 on 2026-10-15 23:06
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def delete_duplicate_reviews(apps, schema_editor):
+    """Keep each user's earliest review of a book so the constraint can be added."""
+    BookReview = apps.get_model('books', 'BookReview')
+    duplicates = (
+        BookReview.objects.values('user_id', 'book_id')
+        .annotate(first_id=Min('review_id'), total=Count('review_id'))
+        .filter(total__gt=1)
+    )
+    for dup in duplicates:
+        BookReview.objects.filter(
+            user_id=dup['user_id'], book_id=dup['book_id']
+        ).exclude(review_id=dup['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0021_book_rating_book_rate_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_reviews, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='bookreview',
+            constraint=models.UniqueConstraint(fields=('user', 'book'), name='uniq_user_book_review'),
+        ),
+    ]
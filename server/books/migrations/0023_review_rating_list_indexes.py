@@ -0,0 +1,51 @@
+# Generated by Django 5.1.2 on 2026-10-15 23:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0022_book_review_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='bookreview',
+            name='review_upvotes_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='bookreview',
+            name='book_review_upvotes_idx',
+        ),
+        migrations.AddIndex(
+            model_name='bookrating',
+            index=models.Index(fields=['-created_at'], name='rating_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookrating',
+            index=models.Index(fields=['book', '-created_at'], name='book_rating_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookrating',
+            index=models.Index(fields=['user', '-created_at'], name='user_rating_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookreview',
+            index=models.Index(fields=['-upvotes_count', '-created_at'], name='review_upvotes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookreview',
+            index=models.Index(fields=['book', '-upvotes_count', '-created_at'], name='book_review_upvotes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookreview',
+            index=models.Index(fields=['book', '-created_at'], name='book_review_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookreview',
+            index=models.Index(fields=['user', '-created_at'], name='user_review_created_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.2 on 2026-10-15 23:08
+
+from django.db import migrations, models
+
+# Seed the running totals from the existing ratings (and resync the stored
+# count/average with them) so incremental updates start from exact values
+BACKFILL_SQL = """
+UPDATE book
+SET rating_sum = stats.total,
+    number_of_ratings = stats.count,
+    average_rate = stats.total / stats.count
+FROM (
+    SELECT book_id, SUM(rate) AS total, COUNT(*) AS count
+    FROM "Book_Rating"
+    GROUP BY book_id
+) AS stats
+WHERE book.isbn13 = stats.book_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0023_review_rating_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='rating_sum',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
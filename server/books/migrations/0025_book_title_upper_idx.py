@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-15 23:19
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0024_book_rating_sum'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(django.db.models.functions.text.Upper('title'), name='book_title_upper_idx'),
+        ),
+    ]
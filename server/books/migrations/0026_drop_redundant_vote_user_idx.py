@@ -0,0 +1,21 @@
+# Generated by Django 5.1.2 on 2026-10-15 23:22
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0025_book_title_upper_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='reviewupvote',
+            name='upvote_user_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='reviewvote',
+            name='vote_user_idx',
+        ),
+    ]
@@ -1,9 +1,11 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.conf import settings
-from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.contrib.postgres.search import SearchVectorField
 from django.contrib.postgres.operations import CreateExtension
+from django.db.models import Case, ExpressionWrapper, F, When
+from django.db.models.functions import Greatest, Upper
 from users.models.profile import Profile
 import manage
 from django.utils import timezone
@@ -22,6 +24,13 @@ class Author(models.Model):
     def __str__(self):
         return self.name
 
+class BookManager(models.Manager):
+    def get_queryset(self):
+        # search_vector is maintained and matched inside Postgres; loading the
+        # tsvector into every Book instance is wasted transfer
+        return super().get_queryset().defer('search_vector')
+
+
 class Book(models.Model):
 
     isbn13 = models.CharField(primary_key=True, max_length=13)
@@ -35,6 +44,8 @@ class Book(models.Model):
     average_rate = models.DecimalField(
         max_digits=3, decimal_places=2, null=True, blank=True
     )
+    # Running total of rates, so average_rate can be kept exact incrementally
+    rating_sum = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     authors = models.ManyToManyField('books.Author', related_name='books', through='BookAuthor')
     genres = models.ManyToManyField('books.Genre', related_name='books')
     language = models.TextField(null=True, blank=True, help_text="Comma-separated list of languages")
@@ -51,12 +62,20 @@ class Book(models.Model):
         ],
         default='database'
     )
+
+    objects = BookManager()
+
     class Meta:
         db_table = "book"
         indexes = [
             # Full-text search indexes using GIN with gin_trgm_ops
             GinIndex(fields=['search_vector'], name='book_search_vector_idx'),
             GinIndex(fields=['title'], name='book_title_gin_idx', opclasses=['gin_trgm_ops']),
+            # istartswith/icontains compile to UPPER("title") LIKE UPPER(%s), which
+            # only an index on the same expression can serve
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'), name='book_title_upper_trgm_idx'),
+            # Exact title__iexact lookups (UPPER("title") = UPPER(%s))
+            models.Index(Upper('title'), name='book_title_upper_idx'),
             GinIndex(fields=['description'], name='book_description_gin_idx', opclasses=['gin_trgm_ops']),
             # B-tree indexes for filtering
             models.Index(fields=['average_rate'], name='book_rating_idx'),
@@ -76,6 +95,25 @@ class Book(models.Model):
     def __str__(self):
         return self.title
 
+    def apply_rating_change(self, count_delta, rate_delta):
+        """
+        Fold an added (1, rate), changed (0, new - old) or removed (-1, -rate)
+        rating into the stored count, sum and average with a single UPDATE, so
+        rating writes don't scan the book's other ratings.
+        """
+        count = F('number_of_ratings') + count_delta
+        total = F('rating_sum') + rate_delta
+        Book.objects.filter(pk=self.pk).update(
+            number_of_ratings=count,
+            rating_sum=total,
+            average_rate=Case(
+                When(number_of_ratings__lte=-count_delta, then=None),
+                default=ExpressionWrapper(total / count, output_field=models.DecimalField()),
+            ),
+            last_updated=timezone.now(),
+        )
+        self.refresh_from_db(fields=['number_of_ratings', 'rating_sum', 'average_rate'])
+
 
 class BookAuthor(models.Model):
     id = models.AutoField(primary_key=True)
@@ -223,6 +261,9 @@ class ReadingListBooks(models.Model):
 
     class Meta:
         db_table = 'Reading_List_Books'
+        constraints = [
+            models.UniqueConstraint(fields=['readinglist', 'book'], name='uniq_rl_book'),
+        ]
         
     def __str__(self):
         return self.book.title
@@ -259,6 +300,14 @@ class BookRating(models.Model):
     class Meta:
         db_table = 'Book_Rating'
         unique_together = ('user', 'book')
+        indexes = [
+            # Lets the per-book rating aggregate run as an index-only scan
+            models.Index(fields=['book', 'rate'], name='rating_book_rate_idx'),
+            # Match the newest-first rating lists, overall, per book and per user
+            models.Index(fields=['-created_at'], name='rating_created_idx'),
+            models.Index(fields=['book', '-created_at'], name='book_rating_created_idx'),
+            models.Index(fields=['user', '-created_at'], name='user_rating_created_idx'),
+        ]
 
     def __str__(self):
         return f'{self.user.username} rated {self.book.title} with {self.rate}'
@@ -284,10 +333,19 @@ class BookReview(models.Model):
     class Meta:
         db_table = 'Book_Review'
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'book'], name='uniq_user_book_review'),
+        ]
+        # Match the list orderings, (-upvotes_count, -created_at) and
+        # -created_at, overall, per book and per user. The upvotes indexes
+        # also serve the top-reviews `upvotes_count >= n` filter as a range
+        # scan, so the many zero-upvote entries are never read there
         indexes = [
-            models.Index(fields=['-upvotes_count'], name='review_upvotes_idx'),
+            models.Index(fields=['-upvotes_count', '-created_at'], name='review_upvotes_idx'),
             models.Index(fields=['-created_at'], name='review_created_idx'),
-            models.Index(fields=['book', '-upvotes_count'], name='book_review_upvotes_idx'),
+            models.Index(fields=['book', '-upvotes_count', '-created_at'], name='book_review_upvotes_idx'),
+            models.Index(fields=['book', '-created_at'], name='book_review_created_idx'),
+            models.Index(fields=['user', '-created_at'], name='user_review_created_idx'),
         ]
     def __str__(self):
         return f'{self.user.username} review for {self.book.title}'
@@ -324,10 +382,10 @@ class ReviewVote(models.Model):
 
     class Meta:
         db_table = 'Review_Vote'
-        unique_together = ('user', 'review')  # One vote per user per review
+        # One vote per user per review; the unique index also serves lookups by user
+        unique_together = ('user', 'review')
         indexes = [
             models.Index(fields=['review'], name='vote_review_idx'),
-            models.Index(fields=['user'], name='vote_user_idx'),
             models.Index(fields=['vote_type'], name='vote_type_idx'),
             models.Index(fields=['created_at'], name='vote_created_idx'),
         ]
@@ -335,48 +393,88 @@ class ReviewVote(models.Model):
     def __str__(self):
         return f'{self.user.username} {self.vote_type}d review {self.review.review_id}'
     
+    # Review counter that each vote type is tallied in
+    COUNT_FIELDS = {'upvote': 'upvotes_count', 'downvote': 'downvotes_count'}
+    
+    @classmethod
+    def _move_count(cls, review_id, old_type=None, new_type=None):
+        """
+        Move one vote between the review's counters with a single UPDATE;
+        either side may be None for a vote that is only added or removed.
+        """
+        changes = {}
+        if old_type:
+            field = cls.COUNT_FIELDS[old_type]
+            changes[field] = Greatest(F(field) - 1, 0)
+        if new_type:
+            field = cls.COUNT_FIELDS[new_type]
+            changes[field] = F(field) + 1
+        BookReview.objects.filter(pk=review_id).update(**changes)
+    
     def save(self, *args, **kwargs):
         """Override save to update review vote counts"""
         is_new = self.pk is None
-        old_vote_type = None
-        
-        if not is_new:
-            # Get the old vote type before updating
-            old_instance = ReviewVote.objects.get(pk=self.pk)
-            old_vote_type = old_instance.vote_type
-        
-        super().save(*args, **kwargs)
-        
-        # Update vote counts
-        if is_new:
-            # New vote
-            if self.vote_type == 'upvote':
-                self.review.upvotes_count = models.F('upvotes_count') + 1
-            else:
-                self.review.downvotes_count = models.F('downvotes_count') + 1
-            self.review.save(update_fields=['upvotes_count', 'downvotes_count'])
-        elif old_vote_type != self.vote_type:
-            # Vote type changed
-            if old_vote_type == 'upvote':
-                self.review.upvotes_count = models.F('upvotes_count') - 1
-                self.review.downvotes_count = models.F('downvotes_count') + 1
-            else:
-                self.review.downvotes_count = models.F('downvotes_count') - 1
-                self.review.upvotes_count = models.F('upvotes_count') + 1
-            self.review.save(update_fields=['upvotes_count', 'downvotes_count'])
+        with transaction.atomic(savepoint=False):
+            old_vote_type = None
+            if not is_new:
+                # Get the old vote type before updating
+                old_vote_type = ReviewVote.objects.filter(pk=self.pk).values_list(
+                    'vote_type', flat=True
+                ).get()
+            
+            super().save(*args, **kwargs)
+            
+            # Update vote counts
+            if is_new:
+                self._move_count(self.review_id, new_type=self.vote_type)
+            elif old_vote_type != self.vote_type:
+                self._move_count(self.review_id, old_vote_type, self.vote_type)
     
     def delete(self, *args, **kwargs):
         """Override delete to update review vote counts"""
-        review = self.review
-        vote_type = self.vote_type
-        super().delete(*args, **kwargs)
+        with transaction.atomic(savepoint=False):
+            result = super().delete(*args, **kwargs)
+            self._move_count(self.review_id, old_type=self.vote_type)
+        return result
+    
+    @classmethod
+    def cast(cls, user, review, vote_type):
+        """
+        Record the user's vote on the review and update its counts. Inserts
+        first and only changes an existing vote when the insert conflicts.
         
-        # Decrement the appropriate vote count
-        if vote_type == 'upvote' and review.upvotes_count > 0:
-            review.upvotes_count = models.F('upvotes_count') - 1
-        elif vote_type == 'downvote' and review.downvotes_count > 0:
-            review.downvotes_count = models.F('downvotes_count') - 1
-        review.save(update_fields=['upvotes_count', 'downvotes_count'])
+        Returns the previous vote type: None for a new vote, and vote_type
+        itself when the vote was already cast and nothing changed.
+        """
+        try:
+            with transaction.atomic():
+                cls.objects.create(user=user, review=review, vote_type=vote_type)
+            return None
+        except IntegrityError:
+            pass
+        
+        with transaction.atomic(savepoint=False):
+            changed = cls.objects.filter(user=user, review=review).exclude(
+                vote_type=vote_type
+            ).update(vote_type=vote_type, updated_at=timezone.now())
+            if not changed:
+                return vote_type
+            previous = 'downvote' if vote_type == 'upvote' else 'upvote'
+            cls._move_count(review.pk, previous, vote_type)
+            return previous
+    
+    @classmethod
+    def toggle(cls, user, review, vote_type):
+        """
+        Remove the user's vote if it already is vote_type, otherwise cast it.
+        Returns the previous vote type, as cast() does.
+        """
+        with transaction.atomic():
+            deleted, _ = cls.objects.filter(user=user, review=review, vote_type=vote_type).delete()
+            if deleted:
+                cls._move_count(review.pk, old_type=vote_type)
+                return vote_type
+            return cls.cast(user, review, vote_type)
 
 
 # Keep the old ReviewUpvote model for backward compatibility
@@ -397,15 +495,35 @@ class ReviewUpvote(models.Model):
 
     class Meta:
         db_table = 'Review_Upvote'
+        # The unique (user, review) index also serves lookups by user
         unique_together = ('user', 'review')
         indexes = [
             models.Index(fields=['review'], name='upvote_review_idx'),
-            models.Index(fields=['user'], name='upvote_user_idx'),
             models.Index(fields=['created_at'], name='upvote_created_idx'),
         ]
 
     def __str__(self):
         return f'{self.user.username} upvoted review {self.review.review_id}'
+    
+    @classmethod
+    def toggle(cls, user, review) -> bool:
+        """
+        Remove the user's upvote on the review, or add one if there was none.
+        Returns True when an upvote was added.
+        """
+        with transaction.atomic():
+            # Delete first: one statement whether or not the upvote exists
+            deleted, _ = cls.objects.filter(user=user, review=review).delete()
+            if deleted:
+                return False
+            try:
+                with transaction.atomic():
+                    cls.objects.create(user=user, review=review)
+            except IntegrityError:
+                # A concurrent toggle inserted it first; the upvote is there
+                # either way
+                pass
+            return True
 
 class Genre(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -416,6 +534,8 @@ class Genre(models.Model):
     class Meta:
         indexes = [
             GinIndex(fields=['name'], name='genre_name_gin_idx', opclasses=['gin_trgm_ops']),
+            # Serves name__iexact lookups, which compile to UPPER("name") = UPPER(%s)
+            models.Index(Upper('name'), name='genre_name_upper_idx'),
         ]
 
     def __str__(self):
@@ -41,12 +41,16 @@ class BookSerializer(serializers.ModelSerializer):
         ]
         
     def get_reviews_count(self, obj):
+        # Use the count annotated by list querysets when present
+        if hasattr(obj, "reviews_total"):
+            return obj.reviews_total
         return obj.reviews.count()
 
     def to_representation(self, instance):
         rep = super().to_representation(instance)
-        # Replace genre names from the M2M field directly
-        rep["genres"] = list(instance.genres.values_list("name", flat=True))
+        # Replace genre names from the M2M field directly (uses prefetched
+        # genres when the queryset has them)
+        rep["genres"] = [genre.name for genre in instance.genres.all()]
         return rep
 
     def create(self, validated_data):
@@ -102,7 +106,8 @@ class ReadingListSerializer(serializers.ModelSerializer):
         read_only_fields = ["list_id", "created_at", "book_count", "owner_username"]
     
     def get_book_count(self, obj):
-        return obj.books.count()
+        # The books are serialized anyway, so count the loaded/prefetched list
+        return len(obj.books.all())
     
     def get_owner_username(self, obj):
         return obj.profile.user.username if obj.profile and obj.profile.user else None
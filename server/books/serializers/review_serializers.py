@@ -1,7 +1,9 @@
 from rest_framework import serializers
-from books.models import BookReview, BookRating, ReviewUpvote, ReviewVote
+from books.models import Book, BookReview, BookRating, ReviewUpvote, ReviewVote
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from django.db.models import Exists, OuterRef
+from django.shortcuts import get_object_or_404
 
 User = get_user_model()
 
@@ -17,6 +19,10 @@ class BookReviewSerializer(serializers.ModelSerializer):
     created_at = serializers.DateTimeField(format='%a %b %d %Y at %I:%M %p', read_only=True)
     updated_at = serializers.DateTimeField(format='%a %b %d %Y at %I:%M %p', read_only=True)
     book_cover = serializers.SerializerMethodField()
+    # Validating the book only needs its key and the columns shown back
+    book = serializers.PrimaryKeyRelatedField(
+        queryset=Book.objects.only('isbn13', 'title', 'cover_img')
+    )
     
     class Meta:
         model = BookReview
@@ -31,6 +37,9 @@ class BookReviewSerializer(serializers.ModelSerializer):
             'net_votes', 'username', 'book_title', 'has_upvoted', 'has_downvoted', 'user_vote_type',
             'profile_pic', 'profile_id', 'book_cover'
         ]
+        # One review per user and book is enforced by the database constraint
+        # at insert time rather than by a separate uniqueness query
+        validators = []
     
     def get_book_title(self, obj):
         return obj.book.title if obj.book else None
@@ -48,38 +57,34 @@ class BookReviewSerializer(serializers.ModelSerializer):
         """Calculate net votes (upvotes - downvotes)"""
         return obj.upvotes_count - obj.downvotes_count
     
+    def _get_user_vote(self, obj):
+        """
+        The current user's vote type on this review, or None. Uses the
+        `current_user_vote` annotation when the view loaded it, and otherwise
+        looks it up once per review.
+        """
+        if not hasattr(obj, 'current_user_vote'):
+            request = self.context.get('request')
+            vote_type = None
+            if request and request.user.is_authenticated:
+                vote_type = ReviewVote.objects.filter(
+                    user=request.user, 
+                    review=obj
+                ).values_list('vote_type', flat=True).first()
+            obj.current_user_vote = vote_type
+        return obj.current_user_vote
+    
     def get_has_upvoted(self, obj):
         """Check if the current user has upvoted this review"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            vote = ReviewVote.objects.filter(
-                user=request.user, 
-                review=obj
-            ).first()
-            return vote.vote_type == 'upvote' if vote else False
-        return False
+        return self._get_user_vote(obj) == 'upvote'
     
     def get_has_downvoted(self, obj):
         """Check if the current user has downvoted this review"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            vote = ReviewVote.objects.filter(
-                user=request.user, 
-                review=obj
-            ).first()
-            return vote.vote_type == 'downvote' if vote else False
-        return False
+        return self._get_user_vote(obj) == 'downvote'
     
     def get_user_vote_type(self, obj):
         """Get the current user's vote type for this review"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            vote = ReviewVote.objects.filter(
-                user=request.user, 
-                review=obj
-            ).first()
-            return vote.vote_type if vote else None
-        return None
+        return self._get_user_vote(obj)
     
     def get_profile_id(self, obj):
         """Get the user's profile ID"""
@@ -172,11 +177,18 @@ class BookRatingSerializer(serializers.ModelSerializer):
     book_title = serializers.SerializerMethodField()
     book_average_rate = serializers.SerializerMethodField()
     created_at = serializers.DateTimeField(format='%a %b %d %Y at %I:%M %p', read_only=True)
+    # apply_rating_change() reloads the rating columns it touches
+    book = serializers.PrimaryKeyRelatedField(
+        queryset=Book.objects.only('isbn13', 'title')
+    )
     
     class Meta:
         model = BookRating
         fields = ['rate_id', 'rate', 'created_at', 'user', 'book', 'username', 'book_title', 'book_average_rate']
         read_only_fields = ['rate_id', 'created_at', 'username', 'book_title', 'book_average_rate']
+        # A repeat rating updates the existing one in create(), relying on
+        # the database's unique (user, book) constraint
+        validators = []
     
     def get_book_title(self, obj):
         return obj.book.title if obj.book else None
@@ -199,42 +211,42 @@ class BookRatingSerializer(serializers.ModelSerializer):
         book = validated_data.get('book')
         user = validated_data.get('user')
         
-        # Check if the user has already rated this book
-        existing_rating = BookRating.objects.filter(user=user, book=book).first()
-        
-        if existing_rating:
-            # Update existing rating
-            existing_rating.rate = validated_data.get('rate')
-            existing_rating.save()
-            return existing_rating
-        
-        # Create new rating
-        rating = BookRating.objects.create(**validated_data)
-        
-        # Update book's average rating and number of ratings
-        book_ratings = BookRating.objects.filter(book=book)
-        book.number_of_ratings = book_ratings.count()
-        
-        if book.number_of_ratings > 0:
-            total_rating = sum(br.rate for br in book_ratings)
-            book.average_rate = total_rating / book.number_of_ratings
-        
-        book.save()
+        with transaction.atomic():
+            # Insert directly; the (user, book) unique constraint turns a
+            # repeat rating, even a concurrent one, into an update of the
+            # existing row
+            try:
+                with transaction.atomic():
+                    rating = BookRating.objects.create(**validated_data)
+                count_delta, rate_delta = 1, rating.rate
+            except IntegrityError:
+                # Lock the existing row so the delta is taken against the
+                # rate it actually replaces, and reuse the already loaded
+                # user and book instead of fetching them again
+                rating = BookRating.objects.select_for_update().get(user=user, book=book)
+                rating.user, rating.book = user, book
+                new_rate = validated_data.get('rate')
+                count_delta, rate_delta = 0, new_rate - rating.rate
+                rating.rate = new_rate
+                rating.save(update_fields=['rate'])
+            
+            # Update book's average rating and number of ratings
+            book.apply_rating_change(count_delta, rate_delta)
         
         return rating
     
     def update(self, instance, validated_data):
-        # Update the rating
-        instance.rate = validated_data.get('rate', instance.rate)
-        instance.save()
-        
-        # Update book's average rating
-        book = instance.book
-        book_ratings = BookRating.objects.filter(book=book)
-        
-        if book_ratings.exists():
-            total_rating = sum(br.rate for br in book_ratings)
-            book.average_rate = total_rating / book_ratings.count()
-            book.save()
+        with transaction.atomic():
+            # Lock the row and take the rate it holds now, not the one loaded
+            # with the instance, so concurrent updates don't skew the sum
+            old_rate = get_object_or_404(
+                BookRating.objects.select_for_update().values_list('rate', flat=True),
+                pk=instance.pk,
+            )
+            instance.rate = validated_data.get('rate', instance.rate)
+            instance.save()
+            
+            # Update book's average rating
+            instance.book.apply_rating_change(0, instance.rate - old_rate)
         
         return instance
\ No newline at end of file
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.db import transaction
+from django.dispatch import receiver
+from books.models import Book
+from books.utils.search_cache import CacheManager
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_search_cache_on_book_change(sender, instance, **kwargs):
+    """Drop cached search results when a book is added, edited or removed."""
+    # After commit, so a concurrent search can't re-cache the old rows under
+    # the new generation
+    transaction.on_commit(CacheManager.bump_generation)
+
+
+@receiver(m2m_changed, sender=Book.authors.through)
+@receiver(m2m_changed, sender=Book.genres.through)
+def invalidate_search_cache_on_book_links(sender, instance, action, **kwargs):
+    """Drop cached search results when a book's authors or genres change."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(CacheManager.bump_generation)
@@ -3,7 +3,7 @@ from django.core.cache import cache
 from django.conf import settings
 from books.models import Book, Author
 from books.utils.external_api_clients import search_external_apis
-from books.utils.book_service import save_external_book
+from books.utils.book_service import save_external_books
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,14 +29,8 @@ def sync_external_books():
                 external_books = search_external_apis(term, max_retries=3, timeout=15)
                 
                 if external_books:
-                    # Save books to database
-                    for book_data in external_books:
-                        try:
-                            save_external_book(book_data)
-                        except Exception as e:
-                            logger.error(f"Error saving external book: {e}")
-                            continue
-                    
+                    # Save books to database in bulk
+                    save_external_books(external_books)
                     logger.info(f"Successfully synced books for term: {term}")
                 
             except Exception as e:
@@ -80,6 +74,18 @@ def update_popular_terms():
     except Exception as e:
         logger.error(f"Error updating popular terms: {e}")
 
+@shared_task
+def persist_external_books(books_data):
+    """
+    Background task to store books fetched from external APIs during a search,
+    so the search response doesn't wait on the inserts.
+    """
+    try:
+        saved = save_external_books(books_data)
+        logger.info(f"Persisted {saved} new external books")
+    except Exception as e:
+        logger.error(f"Error in persist_external_books task: {e}")
+
 @shared_task
 def update_book_metadata():
     """
@@ -0,0 +1,86 @@
+import threading
+import time
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from books.models import Genre
+from books.utils.search_cache import CacheManager
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CacheManagerTests(SimpleTestCase):
+    def setUp(self):
+        CacheManager.bump_generation()
+
+    def search_key(self, query):
+        return CacheManager.generate_cache_key(
+            {'query': query, 'page': 1, 'page_size': 10, 'filters': {}}
+        )
+
+    def test_get_or_compute_runs_once_for_concurrent_misses(self):
+        key = self.search_key('single flight')
+        calls = []
+        start = threading.Barrier(8)
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return [{'title': 'Dune'}], 1
+
+        def worker():
+            start.wait()
+            results.append(CacheManager.get_or_compute(key, compute))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [([{'title': 'Dune'}], 1)] * 8)
+        self.assertEqual(CacheManager._flights, {})
+
+    def test_bump_generation_invalidates_cached_searches(self):
+        key = self.search_key('dune')
+        CacheManager.set_cached_results(key, [{'title': 'Dune'}], 1)
+        self.assertEqual(CacheManager.get_cached_results(key), ([{'title': 'Dune'}], 1))
+
+        CacheManager.bump_generation()
+
+        new_key = self.search_key('dune')
+        self.assertNotEqual(new_key, key)
+        self.assertIsNone(CacheManager.get_cached_results(new_key))
+        # The local tier is cleared as well, not just bypassed by the new key
+        self.assertIsNone(CacheManager._get_local(key))
+
+
+class CachePubliclyTests(TestCase):
+    def setUp(self):
+        Genre.objects.create(name='Science Fiction', description='Books in the Science Fiction category')
+        self.url = reverse('genres-list-api')
+
+    def test_response_is_publicly_cacheable_with_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=60', response['Cache-Control'])
+        self.assertTrue(response.has_header('ETag'))
+
+    def test_matching_if_none_match_returns_304(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_changed_content_gets_a_new_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        Genre.objects.create(name='Fantasy', description='Books in the Fantasy category')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
@@ -0,0 +1,153 @@
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from books.models import Book, BookRating, BookReview, ReviewUpvote, ReviewVote
+from books.serializers.review_serializers import BookRatingSerializer
+from books.views.review_views import BookRatingDeleteAPIView
+
+User = get_user_model()
+
+
+class ReviewVoteCounterTests(TestCase):
+    def setUp(self):
+        author = User.objects.create_user(
+            username='review_author', email='review_author@example.com', password='password123'
+        )
+        self.voter = User.objects.create_user(
+            username='voter', email='voter@example.com', password='password123'
+        )
+        book = Book.objects.create(isbn13='9780000000101', title='Counted Book')
+        self.review = BookReview.objects.create(user=author, book=book, review_text='Worth reading')
+
+    def assertCounts(self, upvotes, downvotes):
+        self.review.refresh_from_db(fields=['upvotes_count', 'downvotes_count'])
+        self.assertEqual(self.review.upvotes_count, upvotes)
+        self.assertEqual(self.review.downvotes_count, downvotes)
+
+    def test_cast_new_vote(self):
+        previous = ReviewVote.cast(self.voter, self.review, 'upvote')
+        self.assertIsNone(previous)
+        self.assertCounts(1, 0)
+
+    def test_cast_same_type_is_a_no_op(self):
+        ReviewVote.cast(self.voter, self.review, 'upvote')
+        previous = ReviewVote.cast(self.voter, self.review, 'upvote')
+        self.assertEqual(previous, 'upvote')
+        self.assertCounts(1, 0)
+        self.assertEqual(ReviewVote.objects.filter(review=self.review).count(), 1)
+
+    def test_cast_switches_type(self):
+        ReviewVote.cast(self.voter, self.review, 'upvote')
+        previous = ReviewVote.cast(self.voter, self.review, 'downvote')
+        self.assertEqual(previous, 'upvote')
+        self.assertCounts(0, 1)
+        self.assertEqual(
+            ReviewVote.objects.get(user=self.voter, review=self.review).vote_type, 'downvote'
+        )
+
+    def test_toggle_off_removes_vote(self):
+        ReviewVote.cast(self.voter, self.review, 'downvote')
+        previous = ReviewVote.toggle(self.voter, self.review, 'downvote')
+        self.assertEqual(previous, 'downvote')
+        self.assertCounts(0, 0)
+        self.assertFalse(ReviewVote.objects.filter(user=self.voter, review=self.review).exists())
+
+    def test_toggle_casts_when_absent(self):
+        previous = ReviewVote.toggle(self.voter, self.review, 'upvote')
+        self.assertIsNone(previous)
+        self.assertCounts(1, 0)
+
+
+    def test_upvote_toggle_loses_insert_race(self):
+        # The other request's insert lands between this one's delete and insert
+        ReviewUpvote.objects.create(user=self.voter, review=self.review)
+        with mock.patch.object(QuerySet, 'delete', return_value=(0, {})):
+            self.assertTrue(ReviewUpvote.toggle(self.voter, self.review))
+        self.assertEqual(ReviewUpvote.objects.filter(review=self.review).count(), 1)
+
+
+class BookRatingCounterTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='rater', email='rater@example.com', password='password123'
+        )
+        self.other = User.objects.create_user(
+            username='other_rater', email='other_rater@example.com', password='password123'
+        )
+        self.book = Book.objects.create(isbn13='9780000000102', title='Rated Book')
+        self.create_url = reverse('api-rating-create')
+
+    def rate(self, user, rate):
+        self.client.force_authenticate(user)
+        response = self.client.post(
+            self.create_url, {'user': user.pk, 'book': self.book.isbn13, 'rate': rate}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return BookRating.objects.get(user=user, book=self.book)
+
+    def assertStats(self, number_of_ratings, rating_sum, average_rate):
+        self.book.refresh_from_db(fields=['number_of_ratings', 'rating_sum', 'average_rate'])
+        self.assertEqual(self.book.number_of_ratings, number_of_ratings)
+        self.assertEqual(self.book.rating_sum, Decimal(rating_sum))
+        if average_rate is None:
+            self.assertIsNone(self.book.average_rate)
+        else:
+            self.assertEqual(self.book.average_rate, Decimal(average_rate))
+
+    def test_create_rating(self):
+        self.rate(self.user, '4.00')
+        self.rate(self.other, '3.00')
+        self.assertStats(2, '7.00', '3.50')
+
+    def test_repeat_rating_replaces_rate(self):
+        self.rate(self.user, '4.00')
+        self.rate(self.user, '2.00')
+        self.assertStats(1, '2.00', '2.00')
+        self.assertEqual(BookRating.objects.filter(book=self.book).count(), 1)
+
+    def test_update_rating(self):
+        self.rate(self.other, '5.00')
+        rating = self.rate(self.user, '1.00')
+        response = self.client.patch(
+            reverse('api-rating-update', kwargs={'rate_id': rating.rate_id}),
+            {'rate': '3.00'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertStats(2, '8.00', '4.00')
+
+    def test_delete_rating(self):
+        self.rate(self.other, '5.00')
+        rating = self.rate(self.user, '1.00')
+        response = self.client.delete(
+            reverse('api-rating-delete', kwargs={'rate_id': rating.rate_id})
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertStats(1, '5.00', '5.00')
+
+    def test_delete_last_rating_clears_average(self):
+        rating = self.rate(self.user, '4.00')
+        self.client.delete(reverse('api-rating-delete', kwargs={'rate_id': rating.rate_id}))
+        self.assertStats(0, '0.00', None)
+
+    def test_update_from_stale_instance(self):
+        self.rate(self.other, '5.00')
+        rating = self.rate(self.user, '1.00')
+        stale = BookRating.objects.get(pk=rating.pk)
+        # Another request changes the rate after this one loaded the row
+        self.rate(self.user, '4.00')
+        BookRatingSerializer().update(stale, {'rate': Decimal('3.00')})
+        self.assertStats(2, '8.00', '4.00')
+
+    def test_repeat_delete_is_not_counted_twice(self):
+        self.rate(self.other, '5.00')
+        rating = self.rate(self.user, '1.00')
+        stale = BookRating.objects.get(pk=rating.pk)
+        self.client.delete(reverse('api-rating-delete', kwargs={'rate_id': rating.rate_id}))
+        # A concurrent delete that loaded the row before it was removed
+        BookRatingDeleteAPIView().perform_destroy(stale)
+        self.assertStats(1, '5.00', '5.00')
@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from books.models import Book, BookReview
+
+User = get_user_model()
+
+
+class ReviewCursorPaginationTests(APITestCase):
+    def setUp(self):
+        self.book = Book.objects.create(isbn13='9780000000201', title='Reviewed Book')
+        for i in range(12):
+            user = User.objects.create(username=f'reviewer{i}', email=f'reviewer{i}@example.com')
+            # Repeat upvote counts so the upvotes ordering has ties to page through
+            BookReview.objects.create(
+                user=user, book=self.book, review_text=f'Review {i}', upvotes_count=i % 3
+            )
+        self.client.force_authenticate(user)
+        self.url = reverse('api-book-reviews', kwargs={'book_id': self.book.isbn13})
+
+    def review_ids(self, results):
+        return [review['review_id'] for review in results]
+
+    def walk(self, params):
+        response = self.client.get(self.url, {**params, 'page_size': 5})
+        ids = []
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids.extend(self.review_ids(response.data['results']))
+            if not response.data['next']:
+                return ids
+            response = self.client.get(response.data['next'])
+
+    def assertWalkMatchesFullList(self, params):
+        full = self.client.get(self.url, params)
+        self.assertEqual(full.status_code, 200)
+        expected = self.review_ids(full.data)
+        self.assertEqual(len(expected), 12)
+        self.assertEqual(self.walk(params), expected)
+
+    def test_cursor_walk_by_created_at(self):
+        self.assertWalkMatchesFullList({})
+        self.assertWalkMatchesFullList({'order': 'asc'})
+
+    def test_cursor_walk_by_upvotes(self):
+        self.assertWalkMatchesFullList({'sort_by': 'upvotes'})
+        self.assertWalkMatchesFullList({'sort_by': 'upvotes', 'order': 'asc'})
@@ -1,36 +1,18 @@
 from typing import Dict, Any, Optional, List
-import requests
 import logging
 from datetime import datetime, timedelta
 from urllib.parse import quote
 import json
 from functools import lru_cache
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
 from django.core.cache import cache
-import asyncio
-import aiohttp
-from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
 from django.db.models import Count
 from books.models import Book, Author
+from books.utils.external_api_clients import get_external_api_pool, http_get
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-def get_requests_session():
-    """Create a requests session with retry logic."""
-    session = requests.Session()
-    retry = Retry(
-        total=3,
-        backoff_factor=0.5,
-        status_forcelist=(500, 502, 503, 504)
-    )
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount('http://', adapter)
-    session.mount('https://', adapter)
-    return session
-
 class AuthorInfoService:
     """Service for fetching comprehensive author information from multiple sources."""
     
@@ -44,6 +26,14 @@ class AuthorInfoService:
     CACHE_TIMEOUT = 60 * 60 * 24  # 24 hours
     CACHE_KEY_PREFIX = "author_info"
     
+    # Lookups are best-effort: a short timeout and no gateway-error retries
+    REQUEST_TIMEOUT = 5
+    
+    @staticmethod
+    def _get(url, params=None):
+        """GET through the shared HTTP client with the lookup timeout."""
+        return http_get(url, params=params, timeout=AuthorInfoService.REQUEST_TIMEOUT, retries=0)
+    
     @staticmethod
     def get_author_info(author_name: str) -> Dict[str, Any]:
         """
@@ -77,15 +67,14 @@ class AuthorInfoService:
             except Exception as e:
                 logger.error(f"Error getting book count for {author_name}: {e}")
             
-            # Use ThreadPoolExecutor for parallel processing
-            with ThreadPoolExecutor(max_workers=2) as executor:
-                # Submit API calls for bio and birth date
-                wikipedia_future = executor.submit(AuthorInfoService._get_wikipedia_info, author_name)
-                wikidata_future = executor.submit(AuthorInfoService._get_wikidata_info, author_name)
-                
-                # Get results
-                wikipedia_data = wikipedia_future.result()
-                wikidata_data = wikidata_future.result()
+            # Query both sources in parallel on the shared external API pool
+            pool = get_external_api_pool()
+            wikipedia_future = pool.submit(AuthorInfoService._get_wikipedia_info, author_name)
+            wikidata_future = pool.submit(AuthorInfoService._get_wikidata_info, author_name)
+            
+            # Get results
+            wikipedia_data = wikipedia_future.result()
+            wikidata_data = wikidata_future.result()
             
             # Merge data from sources
             if wikipedia_data and wikipedia_data.get("bio"):
@@ -116,7 +105,7 @@ class AuthorInfoService:
                 "format": "json"
             }
             
-            response = requests.get(AuthorInfoService.WIKIPEDIA_API_URL, params=search_params, timeout=5)
+            response = AuthorInfoService._get(AuthorInfoService.WIKIPEDIA_API_URL, search_params)
             response.raise_for_status()
             
             data = response.json()
@@ -140,7 +129,7 @@ class AuthorInfoService:
                 "format": "json"
             }
             
-            content_response = requests.get(AuthorInfoService.WIKIPEDIA_API_URL, params=content_params, timeout=5)
+            content_response = AuthorInfoService._get(AuthorInfoService.WIKIPEDIA_API_URL, content_params)
             content_response.raise_for_status()
             
             content_data = content_response.json()
@@ -170,7 +159,7 @@ class AuthorInfoService:
                 "format": "json"
             }
             
-            response = requests.get(AuthorInfoService.WIKIDATA_API_URL, params=search_params, timeout=5)
+            response = AuthorInfoService._get(AuthorInfoService.WIKIDATA_API_URL, search_params)
             response.raise_for_status()
             
             data = response.json()
@@ -192,7 +181,7 @@ class AuthorInfoService:
                 "format": "json"
             }
             
-            entity_response = requests.get(AuthorInfoService.WIKIDATA_API_URL, params=entity_params, timeout=5)
+            entity_response = AuthorInfoService._get(AuthorInfoService.WIKIDATA_API_URL, entity_params)
             entity_response.raise_for_status()
             
             entity_data = entity_response.json()
@@ -228,7 +217,7 @@ class AuthorInfoService:
             search_name = author_name.replace(" ", "+")
             url = f"{AuthorInfoService.LIBRARY_OF_CONGRESS_API_URL}?q={search_name}&format=json"
             
-            response = requests.get(url, timeout=5)
+            response = AuthorInfoService._get(url)
             response.raise_for_status()
             
             # Parse the JSON response
@@ -267,7 +256,7 @@ class AuthorInfoService:
             # First, search for the author
             search_url = f"{AuthorInfoService.GOODREADS_API_URL}?key={settings.GOODREADS_API_KEY}&name={quote(author_name)}"
             
-            response = requests.get(search_url, timeout=5)
+            response = AuthorInfoService._get(search_url)
             response.raise_for_status()
             
             # Parse XML response
@@ -289,7 +278,7 @@ class AuthorInfoService:
             # Get detailed author information
             author_url = f"{AuthorInfoService.GOODREADS_API_URL}/{author_id}?key={settings.GOODREADS_API_KEY}"
             
-            author_response = requests.get(author_url, timeout=5)
+            author_response = AuthorInfoService._get(author_url)
             author_response.raise_for_status()
             
             author_text = author_response.text()
@@ -18,6 +18,28 @@ class BookNormalizer:
     DEFAULT_GENRE = "General"
     DEFAULT_COVER = "https://bookcover-placeholder.com/default-cover.jpg"  # Replace with actual default cover URL
     
+    # Common genre variations and abbreviations
+    GENRE_MAPPING = {
+        "Sci-Fi": "Science Fiction",
+        "Scifi": "Science Fiction",
+        "SF": "Science Fiction",
+        "Sci Fi": "Science Fiction",
+        "YA": "Young Adult",
+        "Historical": "Historical Fiction",
+        "Hist Fic": "Historical Fiction",
+        "Hist-Fic": "Historical Fiction",
+        "Histfic": "Historical Fiction",
+        "Lit": "Literature",
+        "Classic Lit": "Classic Literature",
+        "Classics": "Classic Literature",
+        "Contemp": "Contemporary",
+        "Contemp Fic": "Contemporary Fiction",
+        "Contemp Fiction": "Contemporary Fiction",
+        "Nonfic": "Non-Fiction",
+        "Non Fic": "Non-Fiction",
+        "Non Fiction": "Non-Fiction",
+    }
+    
     @classmethod
     def normalize(cls, book_data: Dict[str, Any], source: str) -> Dict[str, Any]:
         """
@@ -30,6 +52,30 @@ class BookNormalizer:
         Returns:
             Dictionary with normalized book data
         """
+        normalized = cls._normalize_fields(book_data, source)
+        
+        # Log the normalized book
+        cls._log_normalized(normalized, source)
+        
+        return normalized
+    
+    @classmethod
+    def normalize_many(cls, books_data: List[Dict[str, Any]], source: str) -> List[Dict[str, Any]]:
+        """
+        Normalize a batch of books from one source.
+        
+        Same output as calling normalize() per book, but the per-book log
+        lines are only built when DEBUG logging is enabled.
+        """
+        normalized_books = [cls._normalize_fields(book_data, source) for book_data in books_data]
+        if logger.isEnabledFor(logging.DEBUG):
+            for normalized in normalized_books:
+                cls._log_normalized(normalized, source, logging.DEBUG)
+        return normalized_books
+    
+    @classmethod
+    def _normalize_fields(cls, book_data: Dict[str, Any], source: str) -> Dict[str, Any]:
+        """Build the normalized dictionary for a single book"""
         # Create a new dictionary for normalized data
         normalized = {}
         
@@ -61,14 +107,20 @@ class BookNormalizer:
         # Add source information
         normalized["source"] = source
         
-        # Log the normalized book
+        return normalized
+    
+    @classmethod
+    def _log_normalized(cls, normalized: Dict[str, Any], source: str, level: int = logging.INFO) -> None:
+        """Log a one-line summary of a normalized book"""
+        # Skip building the name lists when the line would be dropped
+        if not logger.isEnabledFor(level):
+            return
         author_names = ", ".join([author["name"] if isinstance(author, dict) else author 
                                for author in normalized["authors"]]) or cls.DEFAULT_AUTHOR
         genre_names = ", ".join(normalized["genres"]) or cls.DEFAULT_GENRE
         
-        logger.info(f"Normalized Book: '{normalized['title']}' by {author_names} from {source} with genres: {genre_names}")
-        
-        return normalized
+        logger.log(level, "Normalized Book: '%s' by %s from %s with genres: %s",
+                   normalized['title'], author_names, source, genre_names)
     
     @classmethod
     def _normalize_isbn13(cls, isbn13) -> Optional[str]:
@@ -194,31 +246,8 @@ class BookNormalizer:
                     # Capitalize first letter of each word
                     normalized_genre = clean_genre.title()
                     
-                    # Handle common genre variations and abbreviations
-                    genre_mapping = {
-                        "Sci-Fi": "Science Fiction",
-                        "Scifi": "Science Fiction",
-                        "SF": "Science Fiction",
-                        "Sci Fi": "Science Fiction",
-                        "YA": "Young Adult",
-                        "Historical": "Historical Fiction",
-                        "Hist Fic": "Historical Fiction",
-                        "Hist-Fic": "Historical Fiction",
-                        "Histfic": "Historical Fiction",
-                        "Lit": "Literature",
-                        "Classic Lit": "Classic Literature",
-                        "Classics": "Classic Literature",
-                        "Contemp": "Contemporary",
-                        "Contemp Fic": "Contemporary Fiction",
-                        "Contemp Fiction": "Contemporary Fiction",
-                        "Nonfic": "Non-Fiction",
-                        "Non Fic": "Non-Fiction",
-                        "Non Fiction": "Non-Fiction",
-                    }
-                    
                     # Apply mapping if genre is in the dictionary
-                    if normalized_genre in genre_mapping:
-                        normalized_genre = genre_mapping[normalized_genre]
+                    normalized_genre = cls.GENRE_MAPPING.get(normalized_genre, normalized_genre)
                     
                     normalized_genres.add(normalized_genre)
         
@@ -1,14 +1,15 @@
 from typing import Dict, List, Any, Optional
 import logging
 import requests
-from django.db import transaction
+from django.db import connection, transaction
 from django.utils import timezone
 from books.models import Book, Author, BookAuthor, Genre
 from books.utils.external_api_clients import search_external_apis
+from books.utils.search_cache import CacheManager
 from datetime import datetime
 from dateutil import parser
-from django.db.models import Q
-from django.db.models.functions import Length
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Length, Upper
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -40,6 +41,18 @@ def parse_date(date_value):
         return None
 
 
+def normalize_author_name(author_name: str) -> str:
+    """Normalize an author name to Title Case.
+
+    str.title() matches the per-word capitalize() for plain alphabetic names;
+    apostrophes, hyphens, initials and repeated whitespace fall back to the
+    explicit split/join.
+    """
+    if '  ' not in author_name and author_name.replace(' ', '').isalpha():
+        return author_name.title()
+    return ' '.join(word.capitalize() for word in author_name.split())
+
+
 @transaction.atomic
 def save_external_book(book_data: Dict[str, Any]) -> Optional[Book]:
     """
@@ -56,19 +69,11 @@ def save_external_book(book_data: Dict[str, Any]) -> Optional[Book]:
         logger.warning("Cannot save book: missing required fields (isbn13 or title)")
         return None
     
-    # # Check for network connectivity issues with cover image URL
-    # if book_data.get('cover_img'):
-    #     from books.utils.external_api_clients import check_network_connectivity
-    #     if not check_network_connectivity():
-    #         # If network is down, set cover_img to None to avoid connection errors
-    #         logger.warning(f"Network connectivity issue detected. Setting cover_img to None for book {book_data['title']}")
-    #         book_data['cover_img'] = None
-        
     try:
         # Check if book already exists - use get_or_none pattern to avoid exceptions
         existing_book = Book.objects.filter(isbn13=book_data['isbn13']).first()
         if existing_book:
-            logger.info(f"Book with ISBN13 {book_data['isbn13']} already exists")
+            logger.info("Book with ISBN13 %s already exists", book_data['isbn13'])
             return existing_book  # Return existing book instead of None to allow further processing
         
         
@@ -89,77 +94,47 @@ def save_external_book(book_data: Dict[str, Any]) -> Optional[Book]:
         
         book.save()
         
-        logger.info(f"Book saved: {book.title} (ISBN: {book.isbn13})")
+        logger.info("Book saved: %s (ISBN: %s)", book.title, book.isbn13)
         
         # Process authors
         authors_added = False
-        if book_data.get('authors'):
-            for author_data in book_data.get('authors', []):
-                try:
-                    # Initialize variables
-                    author_name = None
-                
-                    existing_author = None
-                    
-                    # Handle both string author names and author dictionaries
-                    if isinstance(author_data, str):
-                        author_name = author_data.strip()
-                        if not author_name:
-                            continue
-                    else:
-                        # Extract author details from dictionary
-                        author_name = author_data.get('name', '').strip()
-                        if not author_name:
-                            continue
-                        
-                        
-                        
-                    
-                    # Normalize author name (Title Case)
-                    author_name = ' '.join(word.capitalize() for word in author_name.split())
-                    
-                    # First try exact match
-                    existing_author = Author.objects.filter(name__iexact=author_name).first()
-                    
-                    if not existing_author:
-                        # Try to find similar authors
-                        # Look for authors with similar names (containing the same words in any order)
-                        name_words = set(author_name.lower().split())
-                        similar_authors = Author.objects.annotate(
-                            name_length=Length('name')
-                        ).filter(
-                            Q(name__icontains=author_name) |  # Contains the full name
-                            Q(name__iregex=r'\b(' + '|'.join(name_words) + r')\b')  # Contains any of the words
-                        ).order_by('-name_length')  # Prefer longer names (more specific)
-                        
-                        if similar_authors.exists():
-                            # Use the most similar author (longest name match)
-                            existing_author = similar_authors.first()
-                            logger.info(f"Found similar author: '{existing_author.name}' for '{author_name}'")
-                
-                        
-                    # Create new author with normalized data
-                    author = Author.objects.create(
-                            name=author_name,
-                            number_of_books=0,  # Will be updated below
-                    )
-                    
-                    # Check if book-author relationship already exists
-                    if not BookAuthor.objects.filter(book=book, author=author).exists():
-                        # Create book-author relationship
-                        BookAuthor.objects.create(book=book, author=author)
-                        # Update author's book count
-                        author.number_of_books = BookAuthor.objects.filter(author=author).count()
-                        author.save(update_fields=['number_of_books'])
-                        authors_added = True
-                        logger.debug(f"Added author '{author.name}' to book {book.isbn13}")
-                    else:
-                        logger.debug(f"Author '{author.name}' already associated with book {book.isbn13}")
-                    
-                except Exception as e:
-                    logger.warning(f"Error adding author '{author_name if author_name else 'Unknown'}' to book: {e}")
-                    # Continue with other authors even if one fails
-        
+        authors = book_data.get('authors') or ()
+        for author_data in authors:
+            # Handle both string author names and author dictionaries
+            if isinstance(author_data, str):
+                author_name = author_data.strip()
+            else:
+                # Extract author details from dictionary
+                author_name = author_data.get('name', '').strip()
+            if not author_name:
+                continue
+
+            # Normalize author name (Title Case)
+            author_name = normalize_author_name(author_name)
+
+            try:
+                # Create new author with normalized data
+                author = Author.objects.create(
+                        name=author_name,
+                        number_of_books=0,  # Will be updated below
+                )
+
+                # Check if book-author relationship already exists
+                if not BookAuthor.objects.filter(book=book, author=author).exists():
+                    # Create book-author relationship
+                    BookAuthor.objects.create(book=book, author=author)
+                    # Update author's book count
+                    author.number_of_books = BookAuthor.objects.filter(author=author).count()
+                    author.save(update_fields=['number_of_books'])
+                    authors_added = True
+                    logger.debug("Added author %r to book %s", author.name, book.isbn13)
+                else:
+                    logger.debug("Author %r already associated with book %s", author.name, book.isbn13)
+
+            except Exception as e:
+                logger.warning(f"Error adding author '{author_name}' to book: {e}")
+                # Continue with other authors even if one fails
+
         # If no authors were added, create a default author
         if not authors_added:
             try:
@@ -185,61 +160,69 @@ def save_external_book(book_data: Dict[str, Any]) -> Optional[Book]:
         
         # Process genres
         genres_added = False
-        if book_data.get('genres'):
-            for genre_name in book_data.get('genres', []):
-                try:
-                    if genre_name and isinstance(genre_name, str):
-                        # Normalize genre name (trim whitespace, capitalize first letter)
-                        genre_name = genre_name.strip().title()
-                        if not genre_name:
-                            continue
-
-                        # Get or create the primary genre
-                        primary_genre, created = Genre.objects.get_or_create(
-                            name__iexact=genre_name,
-                            defaults={
-                                'name': genre_name,
-                                'description': f"Books in the {genre_name} category"
-                            }
-                        )
-
-                        # Handle genre relationships and hierarchies
-                        if created:
-                            # For new genres, try to find related genres
-                            related_genres = Genre.objects.filter(
-                                name__icontains=genre_name
-                            ).exclude(id=primary_genre.id)
-                            
-                            if related_genres.exists():
-                                # If we found related genres, use the most specific one
-                                # (the one with the longest name, as it's likely more specific)
-                                most_specific = max(related_genres, key=lambda g: len(g.name))
-                                if len(most_specific.name) > len(genre_name):
-                                    # Use the more specific genre instead
-                                    primary_genre = most_specific
-                                    logger.info(f"Using more specific genre '{most_specific.name}' instead of '{genre_name}'")
-                                else:
-                                    # Update the new genre's description to reference related genres
-                                    related_names = [g.name for g in related_genres]
-                                    primary_genre.description = f"Books in the {genre_name} category. Related to: {', '.join(related_names)}"
-                                    primary_genre.save()
-
-                        # Check if book already has this genre
-                        if not book.genres.filter(id=primary_genre.id).exists():  
-                            try:
-                                book.genres.add(primary_genre)                                
-                                genres_added = True
-                                logger.debug(f"Added genre '{primary_genre.name}' to book {book.isbn13}")
-                            except Exception as e:
-                                # Handle potential duplicate key error
-                                if 'unique constraint' not in str(e).lower():
-                                    raise
-                                # If it's a duplicate, just continue
-                                logger.debug(f"Genre '{primary_genre.name}' already exists for book {book.isbn13}")
-
-                except Exception as e:
-                    logger.warning(f"Error adding genre '{genre_name}' to book: {e}")
-                    # Continue with other genres even if one fails
+        genres_to_add = {}
+        genres = book_data.get('genres') or ()
+        for genre_name in genres:
+            if not genre_name or not isinstance(genre_name, str):
+                continue
+
+            # Normalize genre name (trim whitespace, capitalize first letter)
+            genre_name = genre_name.strip().title()
+            if not genre_name:
+                continue
+
+            try:
+                # Look up the primary genre case-insensitively (backed by
+                # genre_name_upper_idx) and only insert when it is missing
+                primary_genre = Genre.objects.filter(name__iexact=genre_name).first()
+                created = primary_genre is None
+                if created:
+                    primary_genre = Genre.objects.create(
+                        name=genre_name,
+                        description=f"Books in the {genre_name} category"
+                    )
+
+                # Handle genre relationships and hierarchies
+                if created:
+                    # For new genres, try to find related genres; longest names
+                    # first, so the cap keeps the most specific ones and the
+                    # description lists them in a stable order
+                    related_genres = list(Genre.objects.filter(
+                        name__icontains=genre_name
+                    ).exclude(id=primary_genre.id).only('id', 'name').order_by(
+                        Length('name').desc(), 'name'
+                    )[:10])
+
+                    if related_genres:
+                        # If we found related genres, use the most specific one
+                        # (the one with the longest name, as it's likely more specific)
+                        most_specific = related_genres[0]
+                        if len(most_specific.name) > len(genre_name):
+                            # Use the more specific genre instead
+                            primary_genre = most_specific
+                            logger.info("Using more specific genre %r instead of %r", most_specific.name, genre_name)
+                        else:
+                            # Update the new genre's description to reference related genres
+                            related_names = [g.name for g in related_genres]
+                            primary_genre.description = f"Books in the {genre_name} category. Related to: {', '.join(related_names)}"
+                            primary_genre.save()
+
+                # Collect genres so they can be attached in a single batch below
+                genres_to_add.setdefault(primary_genre.id, primary_genre)
+
+            except Exception as e:
+                logger.warning(f"Error adding genre '{genre_name}' to book: {e}")
+                # Continue with other genres even if one fails
+
+        if genres_to_add:
+            try:
+                # add() skips existing rows and inserts the rest in one bulk INSERT
+                book.genres.add(*genres_to_add.values())
+                genres_added = True
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Added genres %r to book %s", [g.name for g in genres_to_add.values()], book.isbn13)
+            except Exception as e:
+                logger.warning(f"Error adding genres to book {book.isbn13}: {e}")
 
         # If no genres were added, add default genre
         if not genres_added:
@@ -265,4 +248,149 @@ def save_external_book(book_data: Dict[str, Any]) -> Optional[Book]:
         # Check for specific error types and provide more context
         if 'connection' in str(e).lower():
             logger.error("Network connection error while saving book - check internet connectivity")
-        return None
\ No newline at end of file
+        return None
+
+
+def _author_names(book_data: Dict[str, Any]) -> List[str]:
+    """Normalized, de-duplicated author names of an external book."""
+    names = []
+    for author_data in book_data.get('authors') or ():
+        if isinstance(author_data, str):
+            name = author_data.strip()
+        else:
+            name = (author_data.get('name') or '').strip()
+        if name:
+            name = normalize_author_name(name)
+            if name not in names:
+                names.append(name)
+    return names or ['Unknown Author']
+
+
+def _genre_names(book_data: Dict[str, Any]) -> List[str]:
+    """Normalized, de-duplicated genre names of an external book."""
+    names = []
+    for genre_name in book_data.get('genres') or ():
+        if not genre_name or not isinstance(genre_name, str):
+            continue
+        name = genre_name.strip().title()
+        if name and name not in names:
+            names.append(name)
+    return names or ['Uncategorized']
+
+
+def _resolve_by_name(model, names, defaults):
+    """Map name -> instance for `names`, creating missing rows in one bulk
+    INSERT. Matching is case-insensitive like the per-book path."""
+    names = list(names)
+    if not names:
+        return {}
+    # Case-fold with Postgres' UPPER, not str.upper(): the two disagree on
+    # some names ('ß' -> 'SS' in Python only), and rows are matched in SQL
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT name, UPPER(name) FROM unnest(%s::text[]) AS t(name)', [names])
+        keys = dict(cursor.fetchall())
+    wanted = {key: name for name, key in keys.items()}
+    found = {
+        obj.name_upper: obj
+        for obj in model.objects.annotate(name_upper=Upper('name')).filter(name_upper__in=wanted)
+    }
+    missing = [name for key, name in wanted.items() if key not in found]
+    if missing:
+        model.objects.bulk_create(
+            [model(name=name, **defaults(name)) for name in missing],
+            ignore_conflicts=True
+        )
+        found.update(
+            (obj.name_upper, obj)
+            for obj in model.objects.annotate(name_upper=Upper('name')).filter(
+                name_upper__in=[keys[name] for name in missing]
+            )
+        )
+    return {name: found[key] for name, key in keys.items()}
+
+
+@transaction.atomic
+def save_external_books(books_data: List[Dict[str, Any]]) -> int:
+    """
+    Save a batch of external books with bulk inserts.
+
+    Books that already exist are skipped. Authors and genres for the whole
+    batch are resolved with one lookup each, missing ones are bulk-created,
+    and the M2M rows are inserted with bulk_create(ignore_conflicts=True).
+    Unlike save_external_book, names are matched exactly (case-insensitive),
+    without the similar-name heuristics.
+
+    Args:
+        books_data: Book dictionaries from merge_book_results
+
+    Returns:
+        Number of new books written
+    """
+    new_books = {}
+    for book_data in books_data:
+        isbn13 = book_data.get('isbn13')
+        if isbn13 and book_data.get('title') and isbn13 not in new_books:
+            new_books[isbn13] = book_data
+    if not new_books:
+        return 0
+
+    existing = set(Book.objects.filter(isbn13__in=new_books).values_list('isbn13', flat=True))
+    for isbn13 in existing:
+        del new_books[isbn13]
+    if not new_books:
+        return 0
+
+    Book.objects.bulk_create([
+        Book(
+            isbn13=isbn13,
+            isbn=book_data.get('isbn'),
+            title=book_data['title'].strip(),
+            cover_img=book_data.get('cover_img'),
+            description=(book_data.get('description') or '').strip(),
+            number_of_pages=book_data.get('number_of_pages'),
+            average_rate=0,
+            publication_date=parse_date(book_data.get('publication_date')),
+            source=book_data.get('source', 'openlibrary'),
+            language=book_data.get('language')
+        )
+        for isbn13, book_data in new_books.items()
+    ], ignore_conflicts=True, batch_size=500)
+
+    authors_by_book = {isbn13: _author_names(data) for isbn13, data in new_books.items()}
+    genres_by_book = {isbn13: _genre_names(data) for isbn13, data in new_books.items()}
+
+    authors = _resolve_by_name(
+        Author,
+        {name for names in authors_by_book.values() for name in names},
+        lambda name: {'number_of_books': 0}
+    )
+    genres = _resolve_by_name(
+        Genre,
+        {name for names in genres_by_book.values() for name in names},
+        lambda name: {'description': f"Books in the {name} category"}
+    )
+
+    BookAuthor.objects.bulk_create([
+        BookAuthor(book_id=isbn13, author_id=authors[name].author_id)
+        for isbn13, names in authors_by_book.items() for name in names
+    ], ignore_conflicts=True, batch_size=500)
+    GenreLink = Book.genres.through
+    GenreLink.objects.bulk_create([
+        GenreLink(book_id=isbn13, genre_id=genres[name].id)
+        for isbn13, names in genres_by_book.items() for name in names
+    ], ignore_conflicts=True, batch_size=500)
+
+    # bulk_create skips BookAuthor.save(), so recount the touched authors here
+    author_ids = {author.author_id for author in authors.values()}
+    Author.objects.filter(author_id__in=author_ids).update(
+        number_of_books=Subquery(
+            BookAuthor.objects.filter(author_id=OuterRef('author_id'))
+            .values('author_id').annotate(total=Count('id')).values('total')
+        )
+    )
+
+    # bulk_create doesn't send post_save, so invalidate cached searches here
+    transaction.on_commit(CacheManager.bump_generation)
+
+    logger.info("Bulk saved %d external books", len(new_books))
+    return len(new_books)
@@ -1,45 +1,94 @@
-import requests
+import functools
+import hashlib
+import random
+import re
+import httpx
 import json
 import logging
+import os
+import threading
 import time
-from typing import Dict, List, Any, Optional
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+from typing import Dict, List, Any, Optional, Tuple
 from django.conf import settings
-from concurrent.futures import ThreadPoolExecutor
+from django.core.cache import cache
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, fields
+from itertools import chain
+from operator import itemgetter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Function to check network connectivity
-def check_network_connectivity(test_url="https://www.google.com", timeout=3):
-    """Check if network connection is available
-    
-    Args:
-        test_url: URL to test connection with
-        timeout: Connection timeout in seconds
-        
-    Returns:
-        Boolean indicating if connection is available
-    """
-    try:
-        requests.head(test_url, timeout=timeout)
-        return True
-    except requests.RequestException:
-        return False
-
-def get_requests_session():
-    """Create a requests session with retry logic."""
-    session = requests.Session()
-    retry = Retry(
-        total=3,
-        backoff_factor=0.5,
-        status_forcelist=(500, 502, 503, 504)
+# Gateway errors worth retrying; anything else (including 4xx) is returned as is
+RETRY_STATUSES = frozenset((502, 503, 504))
+MAX_STATUS_RETRIES = 2
+RETRY_BACKOFF = 0.3   # seconds, doubled per attempt
+MAX_RETRY_AFTER = 3   # cap on an API's Retry-After so a request can't stall
+
+def _build_client() -> httpx.Client:
+    """Create the shared HTTP/2 client. Requests to the same host are
+    multiplexed over one connection; the transport retries failed connects."""
+    transport = httpx.HTTPTransport(
+        http2=True,
+        retries=2,
+        limits=httpx.Limits(max_keepalive_connections=32, keepalive_expiry=60)
     )
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount('http://', adapter)
-    session.mount('https://', adapter)
-    return session
+    # Follow redirects like the requests calls this client replaced
+    return httpx.Client(
+        transport=transport, timeout=httpx.Timeout(10, connect=5), follow_redirects=True
+    )
+
+# Shared client so connections to openlibrary.org and googleapis.com are
+# reused across searches (httpx.Client is thread-safe)
+_CLIENT = _build_client()
+
+def get_http_client() -> httpx.Client:
+    """Return the shared sync HTTP client."""
+    return _CLIENT
+
+def http_get(url: str, params: Dict[str, Any], headers: Optional[Dict[str, str]] = None,
+             timeout: Optional[float] = None, retries: int = MAX_STATUS_RETRIES) -> httpx.Response:
+    """GET through the shared client, retrying gateway errors with backoff
+    and honouring a (capped) Retry-After header. `timeout` overrides the
+    client's timeouts; `retries` caps the gateway-error retries."""
+    request_timeout = httpx.USE_CLIENT_DEFAULT if timeout is None else timeout
+    for attempt in range(retries + 1):
+        response = _CLIENT.get(url, params=params, headers=headers, timeout=request_timeout)
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            return response
+        delay = RETRY_BACKOFF * (2 ** attempt)
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            delay = min(int(retry_after), MAX_RETRY_AFTER)
+        time.sleep(delay)
+
+# Long-lived pool for the blocking API calls so searches don't pay thread
+# start-up on every request; bounded so load can't spawn unlimited threads
+_EXTAPI_POOL = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'EXTERNAL_API_CONCURRENCY', min(32, (os.cpu_count() or 4) * 4)),
+    thread_name_prefix='extapi'
+)
+
+def get_external_api_pool() -> ThreadPoolExecutor:
+    """Return the shared thread pool for blocking external API calls."""
+    return _EXTAPI_POOL
+
+def parse_json(content: bytes) -> Any:
+    """Decode a JSON response body straight from bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+# Precompiled ISBN patterns: strip every non-alphanumeric character (same as
+# the str.isalnum() filter) and validate the shape in C instead of per character
+_ISBN_STRIP_RE = re.compile(r'[\W_]+')
+_ISBN13_RE = re.compile(r'[0-9]{13}')
+_ISBN10_RE = re.compile(r'[0-9]{9}[0-9Xx]')
 
 def clean_isbn(isbn: Optional[str]) -> Optional[str]:
     """Clean and validate ISBN to ensure it's in the correct format.
@@ -53,19 +102,173 @@ def clean_isbn(isbn: Optional[str]) -> Optional[str]:
     if not isbn:
         return None
         
-    # Remove any non-alphanumeric characters
-    isbn = ''.join(c for c in isbn if c.isalnum())
+    isbn = _ISBN_STRIP_RE.sub('', isbn)
     
-    # If it's an ISBN-13, ensure it's exactly 13 digits
-    if len(isbn) == 13 and isbn.isdigit():
+    # ISBN-13: exactly 13 digits
+    if _ISBN13_RE.fullmatch(isbn):
         return isbn
         
-    # If it's an ISBN-10, ensure it's exactly 10 characters (digits or X)
-    if len(isbn) == 10 and (isbn[:-1].isdigit() and (isbn[-1].isdigit() or isbn[-1].upper() == 'X')):
-        return isbn
+    # ISBN-10: 9 digits followed by a digit or X
+    if _ISBN10_RE.fullmatch(isbn):
+        return isbn.upper()
         
     return None
 
+def _search_term(query: str) -> str:
+    """Return the upstream search term; ISBN-13 queries are searched as `isbn:<isbn13>`."""
+    isbn13 = clean_isbn(query)
+    if isbn13 and len(isbn13) == 13:
+        return f"isbn:{isbn13}"
+    return query
+
+# Cache settings for merged external API results
+EXTERNAL_CACHE_PREFIX = f"{settings.CACHE_KEY_PREFIX}:extapi"
+EXTERNAL_CACHE_TIMEOUT = 3600  # 1 hour
+EXTERNAL_CACHE_JITTER = 600    # Spread expiries so hot keys don't all expire together
+ISBN_CACHE_TIMEOUT = 60 * 60 * 24 * 7  # Metadata for a single ISBN is near-immutable
+
+def _external_cache_key(query: str) -> str:
+    """Build the cache key for an external search from the normalized query."""
+    normalized = query.strip().lower()
+    isbn13 = clean_isbn(normalized)
+    if isbn13 and len(isbn13) == 13:
+        return f"{EXTERNAL_CACHE_PREFIX}:isbn:{isbn13}"
+    digest = hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+    return f"{EXTERNAL_CACHE_PREFIX}:{digest}"
+
+def _external_cache_timeout(cache_key: str) -> int:
+    """Return a jittered TTL, with a longer base TTL for ISBN lookups."""
+    if cache_key.startswith(f"{EXTERNAL_CACHE_PREFIX}:isbn:"):
+        return ISBN_CACHE_TIMEOUT
+    return EXTERNAL_CACHE_TIMEOUT + random.randint(0, EXTERNAL_CACHE_JITTER)
+
+def _get_cached_external(cache_key: str) -> Optional[List[Dict[str, Any]]]:
+    try:
+        return cache.get(cache_key)
+    except Exception as e:
+        logger.error(f"External API cache retrieval error: {e}")
+        return None
+
+def _set_cached_external(cache_key: str, results: List[Dict[str, Any]]) -> None:
+    # Empty results are not cached so a transient upstream outage isn't pinned
+    if not results:
+        return
+    try:
+        cache.set(cache_key, results, timeout=_external_cache_timeout(cache_key))
+    except Exception as e:
+        logger.error(f"External API cache storage error: {e}")
+
+# Single-flight bookkeeping: concurrent cache misses for the same key wait for
+# the one in-flight fetch instead of all hitting the external APIs
+SINGLE_FLIGHT_WAIT_TIMEOUT = 30  # seconds a follower waits for the leader
+_INFLIGHT_LOCK = threading.Lock()
+_INFLIGHT = {}
+
+class _InFlightSearch:
+    """A fetch in progress that other threads can wait on."""
+    __slots__ = ('event', 'result')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+def cache_external_results(func):
+    """Cache-aside wrapper for the external search functions, keyed on the
+    normalized query. Concurrent misses for the same key are coalesced into
+    a single fetch.
+
+    The wrapped function returns (results, complete) and callers get just
+    the results; results missing an API that failed or timed out are not
+    cached, so a short deadline can't pin a partial answer for the TTL."""
+    @functools.wraps(func)
+    def wrapper(query: str, *args, **kwargs):
+        cache_key = _external_cache_key(query)
+        cached = _get_cached_external(cache_key)
+        if cached is not None:
+            logger.debug(f"External API cache hit for query: {query}")
+            return cached
+
+        with _INFLIGHT_LOCK:
+            call = _INFLIGHT.get(cache_key)
+            is_leader = call is None
+            if is_leader:
+                call = _INFLIGHT[cache_key] = _InFlightSearch()
+
+        if not is_leader:
+            # Another thread is already fetching this query; reuse its result
+            if call.event.wait(timeout=SINGLE_FLIGHT_WAIT_TIMEOUT) and call.result is not None:
+                return call.result
+            # The leader failed or took too long, fetch ourselves
+            return func(query, *args, **kwargs)[0]
+
+        try:
+            results, complete = func(query, *args, **kwargs)
+            if complete:
+                _set_cached_external(cache_key, results)
+            call.result = results
+            return results
+        finally:
+            with _INFLIGHT_LOCK:
+                _INFLIGHT.pop(cache_key, None)
+            call.event.set()
+    return wrapper
+
+@dataclass(slots=True)
+class ExternalBook:
+    """A book parsed from an external API response.
+
+    Slotted to keep the per-result footprint small while results from both
+    APIs are held for merging; converted to a dict once merged.
+    """
+    isbn13: Optional[str]
+    title: str
+    source: str
+    isbn: Optional[str] = None
+    authors: List[Dict[str, str]] = field(default_factory=list)
+    cover_img: Optional[str] = None
+    publication_date: Any = None
+    number_of_pages: Optional[int] = None
+    description: str = ""
+    genres: List[str] = field(default_factory=list)
+    language: Optional[str] = None
+    average_rating: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in _EXTERNAL_BOOK_FIELDS}
+
+_EXTERNAL_BOOK_FIELDS = tuple(f.name for f in fields(ExternalBook))
+
+# ETag validators per API request: once the merged search cache expires, the
+# same request is revalidated with If-None-Match and a 304 reuses these books
+VALIDATOR_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day
+
+def _validator_cache_key(url: str, params: Dict[str, Any]) -> str:
+    """Build the validator cache key for one API request."""
+    raw = url + "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+    digest = hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+    return f"{EXTERNAL_CACHE_PREFIX}:etag:{digest}"
+
+def _get_validator(cache_key: str) -> Optional[Tuple[str, List[ExternalBook]]]:
+    """Return the stored (etag, books) pair for a request, if any."""
+    try:
+        return cache.get(cache_key)
+    except Exception as e:
+        logger.error(f"External API validator retrieval error: {e}")
+        return None
+
+def _set_validator(cache_key: str, etag: Optional[str], books: List[ExternalBook]) -> None:
+    """Store (or refresh the TTL of) the validator for a request."""
+    if not etag or not books:
+        return
+    try:
+        cache.set(cache_key, (etag, books), timeout=VALIDATOR_CACHE_TIMEOUT)
+    except Exception as e:
+        logger.error(f"External API validator storage error: {e}")
+
+def _conditional_headers(validator: Optional[Tuple[str, List[ExternalBook]]]) -> Dict[str, str]:
+    """Request headers that let the API answer 304 for an unchanged response."""
+    return {"If-None-Match": validator[0]} if validator else {}
+
 class OpenLibraryClient:
     """Client for interacting with the OpenLibrary API"""
     BASE_URL = "https://openlibrary.org/api"
@@ -74,98 +277,105 @@ class OpenLibraryClient:
     
     # Fields we want to retrieve from OpenLibrary
     FIELDS = [
-        "key", "title", "author_name", "isbn", "cover_i",
+        "title", "author_name", "isbn", "cover_i",
         "first_publish_year", "number_of_pages_median", "description",
         "subject", "language", "ratings_average"
     ]
+    FIELDS_STR = ",".join(FIELDS)
     
     @classmethod
-    def search_books(cls, query: str, page_size: int = 15) -> List[Dict[str, Any]]:
+    def search_books(cls, query: str, page_size: int = 15, offset: int = 0) -> List[ExternalBook]:
         """Search for books using OpenLibrary API
         
         Args:
             query: Search query string (can be ISBN-13, title, or author)
             page_size: Number of results to return (default: 15)
+            offset: Number of results to skip, for fetching later pages
             
         Returns:
-            List of book dictionaries
+            List of ExternalBook records
         """
         if not query or len(query.strip()) < 2:
             logger.warning("Query too short for OpenLibrary search")
             return []
             
         try:
-            # Use session with retry logic and timeout
-            session = get_requests_session()
-            
-            # If query looks like an ISBN-13, search specifically for it
-            isbn13 = clean_isbn(query)
-            if isbn13 and len(isbn13) == 13:
-                response = session.get(
-                    cls.SEARCH_URL,
-                    params={
-                        "q": f"isbn:{isbn13}",
-                        "limit": page_size,
-                        "fields": ",".join(cls.FIELDS)
-                    },
-                    timeout=(5, 10)
-                )
-            else:
-                response = session.get(
-                    cls.SEARCH_URL,
-                    params={
-                        "q": query,
-                        "limit": page_size,
-                        "fields": ",".join(cls.FIELDS)
-                    },
-                    timeout=(5, 10)
-                )
-            
+            # Use the shared client with retry logic, revalidating any
+            # previously seen response for the same request
+            params = cls._search_params(query, page_size, offset)
+            validator_key = _validator_cache_key(cls.SEARCH_URL, params)
+            validator = _get_validator(validator_key)
+            response = http_get(
+                cls.SEARCH_URL,
+                params=params,
+                headers=_conditional_headers(validator)
+            )
+            if response.status_code == 304 and validator:
+                _set_validator(validator_key, *validator)
+                return validator[1]
             response.raise_for_status()
-            data = response.json()
-            
-            books = []
-            for doc in data.get("docs", []):
-                # Get basic author information
-                author_names = doc.get("author_name", [])
-                authors = [{"name": name} for name in author_names]
-                
-                # Get cover image
-                cover_img = None
-                if doc.get("cover_i"):
-                    cover_img = f"https://covers.openlibrary.org/b/id/{doc['cover_i']}-L.jpg"
-                
-                # Clean ISBNs
-                isbn = clean_isbn(doc.get("isbn", [None])[0])
-                
-                # Get all languages as comma-separated string
-                languages = doc.get("language", [])
-                language_str = ", ".join(lang for lang in languages if lang) if languages else None
-                
-                # Format book data
-                book = {
-                    "isbn13": isbn if isbn and len(isbn) == 13 else None,
-                    "isbn": isbn if isbn and len(isbn) == 10 else None,
-                    "title": doc.get("title", ""),
-                    "authors": authors,
-                    "cover_img": cover_img,
-                    "publication_date": doc.get("first_publish_year"),
-                    "number_of_pages": doc.get("number_of_pages_median"),
-                    "description": doc.get("description", ""),
-                    "genres": doc.get("subject", [])[:5],
-                    "source": "openlibrary",
-                    "language": language_str,
-                    "average_rating": doc.get("ratings_average"),
-                }
-            if book["isbn13"]:
-                books.append(book)
-            
+            books = cls._parse_books(parse_json(response.content), limit=page_size)
+            _set_validator(validator_key, response.headers.get("ETag"), books)
             return books
             
-        except requests.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e:
             logger.error(f"Error searching OpenLibrary: {e}")
             return []
 
+    @classmethod
+    def _search_params(cls, query: str, page_size: int, offset: int = 0) -> Dict[str, Any]:
+        """Build the search.json query parameters."""
+        params = {"q": _search_term(query), "limit": page_size, "fields": cls.FIELDS_STR}
+        if offset:
+            params["offset"] = offset
+        return params
+
+    @classmethod
+    def _parse_books(cls, data: Dict[str, Any], limit: Optional[int] = None) -> List[ExternalBook]:
+        """Convert a search.json response body into ExternalBook records,
+        stopping once `limit` books have been collected."""
+        books = []
+        for doc in data.get("docs", []):
+            if limit is not None and len(books) >= limit:
+                break
+
+            # Only books with an ISBN-13 are kept, so check it before building
+            # the rest of the record
+            isbn = clean_isbn((doc.get("isbn") or [None])[0])
+            if not isbn or len(isbn) != 13:
+                continue
+
+            # Get basic author information
+            author_names = doc.get("author_name", [])
+            authors = [{"name": name} for name in author_names]
+            
+            # Get cover image
+            cover_img = None
+            if doc.get("cover_i"):
+                cover_img = f"https://covers.openlibrary.org/b/id/{doc['cover_i']}-L.jpg"
+            
+            # Get all languages as comma-separated string
+            languages = doc.get("language", [])
+            language_str = ", ".join(lang for lang in languages if lang) if languages else None
+            
+            # Format book data
+            books.append(ExternalBook(
+                isbn13=isbn,
+                isbn=None,
+                title=doc.get("title", ""),
+                authors=authors,
+                cover_img=cover_img,
+                publication_date=doc.get("first_publish_year"),
+                number_of_pages=doc.get("number_of_pages_median"),
+                description=doc.get("description", ""),
+                genres=doc.get("subject", [])[:5],
+                source="openlibrary",
+                language=language_str,
+                average_rating=doc.get("ratings_average"),
+            ))
+        
+        return books
+
 class GoogleBooksClient:
     """Client for interacting with the Google Books API"""
     BASE_URL = "https://www.googleapis.com/books/v1/volumes"
@@ -179,148 +389,149 @@ class GoogleBooksClient:
     )
     
     @classmethod
-    def search_books(cls, query: str, page_size: int = 15) -> List[Dict[str, Any]]:
+    def search_books(cls, query: str, page_size: int = 15, offset: int = 0) -> List[ExternalBook]:
         """Search for books using Google Books API
         
         Args:
             query: Search query string (can be ISBN-13, title, or author)
             page_size: Number of results to return (default: 15)
+            offset: Number of results to skip, for fetching later pages
             
         Returns:
-            List of book dictionaries
+            List of ExternalBook records
         """
         if not query or len(query.strip()) < 2:
             logger.warning("Query too short for Google Books search")
             return []
             
         try:
-            # Use session with retry logic and timeout
-            session = get_requests_session()
-            
-            # If query looks like an ISBN-13, search specifically for it
-            isbn13 = clean_isbn(query)
-            if isbn13 and len(isbn13) == 13:
-                response = session.get(
-                    cls.BASE_URL,
-                    params={
-                        "q": f"isbn:{isbn13}",
-                        "maxResults": min(page_size, cls.MAX_RESULTS),
-                        "fields": cls.FIELDS
-                    },
-                    timeout=(5, 10)
-                )
-            else:
-                response = session.get(
-                    cls.BASE_URL,
-                    params={
-                        "q": query,
-                        "maxResults": min(page_size, cls.MAX_RESULTS),
-                        "fields": cls.FIELDS
-                    },
-                    timeout=(5, 10)
-                )
-            
+            # Use the shared client with retry logic, revalidating any
+            # previously seen response for the same request
+            params = cls._search_params(query, page_size, offset)
+            validator_key = _validator_cache_key(cls.BASE_URL, params)
+            validator = _get_validator(validator_key)
+            response = http_get(
+                cls.BASE_URL,
+                params=params,
+                headers=_conditional_headers(validator)
+            )
+            if response.status_code == 304 and validator:
+                _set_validator(validator_key, *validator)
+                return validator[1]
             response.raise_for_status()
-            data = response.json()
-            
-            books = []
-            for item in data.get("items", []):
-                volume_info = item.get("volumeInfo", {})
-                
-                # Extract and clean ISBNs
-                industry_identifiers = volume_info.get("industryIdentifiers", [])
-                isbn13 = clean_isbn(next((id_info.get("identifier") for id_info in industry_identifiers 
-                              if id_info.get("type") == "ISBN_13"), None))
-                isbn10 = clean_isbn(next((id_info.get("identifier") for id_info in industry_identifiers 
-                              if id_info.get("type") == "ISBN_10"), None))
-                
-                # Get basic author information
-                author_names = volume_info.get("authors", [])
-                authors = [{"name": name} for name in author_names]
-                
-                # Get cover image
-                cover_img = None
-                if volume_info.get("imageLinks", {}).get("thumbnail"):
-                    cover_img = volume_info["imageLinks"]["thumbnail"]
-                
-                # Get language as comma-separated string
-                language = volume_info.get("language")
-                language_str = language if language else None
-                
-                # Format book data with available fields
-                book = {
-                    "isbn13": isbn13,
-                    "isbn": isbn10,
-                    "title": volume_info.get("title", ""),
-                    "authors": authors,
-                    "cover_img": cover_img,
-                    "publication_date": volume_info.get("publishedDate"),
-                    "number_of_pages": volume_info.get("pageCount"),
-                    "description": volume_info.get("description", ""),
-                    "genres": volume_info.get("categories", [])[:5] if volume_info.get("categories") else [],
-                    "source": "googlebooks",
-                    "language": language_str,
-                    "average_rating": volume_info.get("averageRating")
-                }
-                books.append(book)
-            
+            books = cls._parse_books(parse_json(response.content), limit=page_size)
+            _set_validator(validator_key, response.headers.get("ETag"), books)
             return books
             
-        except requests.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e:
             logger.error(f"Error searching Google Books: {e}")
             return []
 
-def evaluate_book_completeness(book: Dict[str, Any]) -> float:
+    @classmethod
+    def _search_params(cls, query: str, page_size: int, offset: int = 0) -> Dict[str, Any]:
+        """Build the volumes query parameters."""
+        params = {
+            "q": _search_term(query),
+            "maxResults": min(page_size, cls.MAX_RESULTS),
+            "fields": cls.FIELDS
+        }
+        if offset:
+            params["startIndex"] = offset
+        return params
+
+    @classmethod
+    def _parse_books(cls, data: Dict[str, Any], limit: Optional[int] = None) -> List[ExternalBook]:
+        """Convert a volumes response body into ExternalBook records,
+        stopping once `limit` books have been collected."""
+        books = []
+        for item in data.get("items", []):
+            if limit is not None and len(books) >= limit:
+                break
+
+            volume_info = item.get("volumeInfo", {})
+            
+            # Extract and clean ISBNs in a single pass over the identifiers,
+            # keeping the first identifier of each type
+            isbn13 = isbn10 = None
+            for id_info in volume_info.get("industryIdentifiers", []):
+                id_type = id_info.get("type")
+                if id_type == "ISBN_13" and isbn13 is None:
+                    isbn13 = id_info.get("identifier")
+                elif id_type == "ISBN_10" and isbn10 is None:
+                    isbn10 = id_info.get("identifier")
+            isbn13 = clean_isbn(isbn13)
+            isbn10 = clean_isbn(isbn10)
+            
+            # Get basic author information
+            author_names = volume_info.get("authors", [])
+            authors = [{"name": name} for name in author_names]
+            
+            # Get cover image
+            cover_img = None
+            if volume_info.get("imageLinks", {}).get("thumbnail"):
+                cover_img = volume_info["imageLinks"]["thumbnail"]
+            
+            # Get language as comma-separated string
+            language = volume_info.get("language")
+            language_str = language if language else None
+            
+            # Format book data with available fields
+            book = ExternalBook(
+                isbn13=isbn13,
+                isbn=isbn10,
+                title=volume_info.get("title", ""),
+                authors=authors,
+                cover_img=cover_img,
+                publication_date=volume_info.get("publishedDate"),
+                number_of_pages=volume_info.get("pageCount"),
+                description=volume_info.get("description", ""),
+                genres=volume_info.get("categories", [])[:5] if volume_info.get("categories") else [],
+                source="googlebooks",
+                language=language_str,
+                average_rating=volume_info.get("averageRating")
+            )
+            books.append(book)
+        
+        return books
+
+# Field weights for evaluate_book_completeness: the first seven are the
+# required fields, the rest optional. Built once instead of on every call.
+_COMPLETENESS_WEIGHTS = (
+    ('title', 0.2),
+    ('authors', 0.2),
+    ('isbn13', 0.15),
+    ('description', 0.15),
+    ('cover_img', 0.1),
+    ('publication_date', 0.1),
+    ('genres', 0.1),
+    ('number_of_pages', 0.05),
+    ('language', 0.05),
+    ('publisher', 0.05),
+    ('average_rating', 0.05),
+    ('ratings_count', 0.05),
+)
+
+def evaluate_book_completeness(book: ExternalBook) -> float:
     """
     Evaluate how complete a book's information is.
     Returns a score between 0 and 1, where 1 means all important fields are present.
     
     Args:
-        book: Book dictionary from either API
+        book: Parsed book from either API
         
     Returns:
         Completeness score (0-1)
     """
-    # Define required and optional fields with their weights
-    required_fields = {
-        'title': 0.2,
-        'authors': 0.2,
-        'isbn13': 0.15,
-        'description': 0.15,
-        'cover_img': 0.1,
-        'publication_date': 0.1,
-        'genres': 0.1
-    }
-    
-    optional_fields = {
-        'number_of_pages': 0.05,
-        'language': 0.05,
-        'publisher': 0.05,
-        'average_rating': 0.05,
-        'ratings_count': 0.05
-    }
-    
+    # A field counts when it is truthy, which already excludes empty
+    # author/genre lists
     score = 0.0
-    
-    # Check required fields
-    for field, weight in required_fields.items():
-        if field in book and book[field]:
-            if field == 'authors' and len(book[field]) > 0:
-                score += weight
-            elif field == 'genres' and len(book[field]) > 0:
-                score += weight
-            elif field != 'authors' and field != 'genres':
-                score += weight
-    
-    # Check optional fields
-    for field, weight in optional_fields.items():
-        if field in book and book[field]:
+    for name, weight in _COMPLETENESS_WEIGHTS:
+        if getattr(book, name, None):
             score += weight
-    
     return score
 
-def merge_book_results(openlibrary_books: List[Dict[str, Any]], 
-                      googlebooks_books: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def merge_book_results(openlibrary_books: List[ExternalBook], 
+                      googlebooks_books: List[ExternalBook]) -> List[Dict[str, Any]]:
     """
     Merge and deduplicate book results from both APIs, keeping the most complete information.
     
@@ -329,137 +540,130 @@ def merge_book_results(openlibrary_books: List[Dict[str, Any]],
         googlebooks_books: List of books from GoogleBooks
         
     Returns:
-        List of merged books with the most complete information
+        List of merged book dictionaries with the most complete information
     """
-    # Create a dictionary to store the best version of each book
+    # One pass over both sources keeps the best-scoring copy of each ISBN-13
+    # and indexes each source's first copy for the cross-source fill-in below
+    books_by_source = {'openlibrary': {}, 'googlebooks': {}}
     best_books = {}
-    
-    # Process OpenLibrary books
-    for book in openlibrary_books:
-        isbn13 = book.get('isbn13')
+    for book, source in chain(
+        ((b, 'openlibrary') for b in openlibrary_books),
+        ((b, 'googlebooks') for b in googlebooks_books)
+    ):
+        isbn13 = book.isbn13
         if not isbn13:
             continue
-            
-        score = evaluate_book_completeness(book)
-        if isbn13 not in best_books or score > best_books[isbn13]['score']:
-            best_books[isbn13] = {
-                'book': book,
-                'score': score,
-                'source': 'openlibrary'
-            }
-    
-    # Process GoogleBooks books
-    for book in googlebooks_books:
-        isbn13 = book.get('isbn13')
-        if not isbn13:
-            continue
-            
+
+        books_by_source[source].setdefault(isbn13, book)
         score = evaluate_book_completeness(book)
-        if isbn13 not in best_books or score > best_books[isbn13]['score']:
-            best_books[isbn13] = {
-                'book': book,
-                'score': best_books[isbn13]['score'] if isbn13 in best_books else 0,
-                'source': 'googlebooks'
-            }
+        best = best_books.get(isbn13)
+        if best is None or score > best[0]:
+            best_books[isbn13] = (score, book, source)
     
     # Merge information from both sources when available
-    for isbn13, book_info in best_books.items():
-        book = book_info['book']
-        other_source = 'googlebooks' if book_info['source'] == 'openlibrary' else 'openlibrary'
+    for isbn13, (_, book, source) in best_books.items():
+        other_source = 'googlebooks' if source == 'openlibrary' else 'openlibrary'
         
         # Find the same book in the other source
-        other_books = googlebooks_books if other_source == 'googlebooks' else openlibrary_books
-        other_book = next((b for b in other_books if b.get('isbn13') == isbn13), None)
+        other_book = books_by_source[other_source].get(isbn13)
         
         if other_book:
             # Merge missing information
-            for key, value in other_book.items():
-                if key not in book or not book[key]:
-                    book[key] = value
-                elif key == 'authors' and len(book[key]) < len(value):
-                    # Merge unique authors
-                    existing_names = {a.get('name') for a in book[key]}
-                    book[key].extend([a for a in value if a.get('name') not in existing_names])
-                elif key == 'genres' and len(book[key]) < len(value):
-                    # Merge unique genres
-                    existing_genres = set(book[key])
-                    book[key].extend([g for g in value if g not in existing_genres])
+            for key in _EXTERNAL_BOOK_FIELDS:
+                value = getattr(other_book, key)
+                current = getattr(book, key)
+                if not current:
+                    setattr(book, key, value)
+                elif key == 'authors':
+                    # Append authors missing by name, in one ordered pass
+                    seen = {a.get('name') for a in current}
+                    for author in value:
+                        name = author.get('name')
+                        if name and name not in seen:
+                            seen.add(name)
+                            current.append(author)
+                elif key == 'genres':
+                    # Append genres not already present, in one ordered pass
+                    seen = set(current)
+                    for genre in value:
+                        if genre and genre not in seen:
+                            seen.add(genre)
+                            current.append(genre)
     
-    # Return the merged books, sorted by completeness score
-    return [info['book'] for info in sorted(best_books.values(), 
-                                          key=lambda x: x['score'], 
-                                          reverse=True)]
+    # Return the merged books as dicts, sorted by completeness score
+    return [book.to_dict() for _, book, _ in sorted(best_books.values(),
+                                                     key=itemgetter(0),
+                                                     reverse=True)]
 
-def search_external_apis(query: str, max_retries=2, timeout=10) -> List[Dict[str, Any]]:
-    """Search for books across all external APIs with retry mechanism
+def query_external_apis(query: str, page_size: int = 15, timeout: float = 10,
+                        offset: int = 0) -> Tuple[List[ExternalBook], List[ExternalBook], bool]:
+    """Query OpenLibrary and Google Books concurrently on the shared pool.
     
     Args:
         query: Search query string
-        max_retries: Maximum number of retries if all APIs fail
-        timeout: Timeout in seconds for API requests (default: 10)
+        page_size: Number of results to request from each API
+        timeout: Overall deadline in seconds for both calls
+        offset: Number of results each API should skip, for later pages
         
     Returns:
-        Combined list of book dictionaries from all APIs with complete author information
+        (openlibrary_results, googlebooks_results, complete); an API that
+        failed or missed the deadline contributes an empty list and clears
+        complete
     """
-    # First check network connectivity
-    if not check_network_connectivity():
-        logger.error("Network connectivity issue detected. Cannot reach external APIs.")
-        return []
-        
-    retry_count = 0
-    openlibrary_results = []
-    googlebooks_results = []
-    
-    while retry_count <= max_retries and not (openlibrary_results or googlebooks_results):
-        if retry_count > 0:
-            logger.info(f"Retry attempt {retry_count} for external API search")
-            # Add exponential backoff between retries
-            time.sleep(2 ** retry_count)
-            
-        # Search both APIs with custom timeout
+    # Query both APIs concurrently; the calls are network-bound so the
+    # total latency is roughly that of the slower API instead of the sum
+    futures = {
+        _EXTAPI_POOL.submit(OpenLibraryClient.search_books, query, page_size, offset): 'OpenLibrary',
+        _EXTAPI_POOL.submit(GoogleBooksClient.search_books, query, page_size, offset): 'Google Books',
+    }
+    # One deadline for both calls; a hung API must not hold the request past
+    # it, so stragglers are left to finish in the pool
+    done, _ = wait(futures, timeout=timeout)
+
+    # Collect each result independently so one failing or slow API doesn't
+    # discard the results of the other
+    results = {}
+    complete = True
+    for future, api_name in futures.items():
+        if future not in done:
+            logger.error(f"Timed out searching {api_name} (timeout={timeout}s)")
+            results[api_name] = []
+            complete = False
+            continue
         try:
-            # Override the default timeout in the API clients
-            session = get_requests_session()
-            # Adjust the timeout for both connection and read operations
-            conn_timeout = min(timeout/3, 5)  # Connection timeout (max 5 seconds)
-            read_timeout = timeout - conn_timeout  # Remaining time for read
-            
-            # Pass custom timeout to API clients through their session objects
-            with requests.Session() as custom_session:
-                # Configure the session with retry logic
-                retry = Retry(
-                    total=max_retries,
-                    read=max_retries,
-                    connect=max_retries,
-                    backoff_factor=0.5,
-                    status_forcelist=(500, 502, 503, 504),
-                )
-                adapter = HTTPAdapter(max_retries=retry)
-                custom_session.mount('http://', adapter)
-                custom_session.mount('https://', adapter)
-                
-                # Use the session for both API clients
-                openlibrary_results = OpenLibraryClient.search_books(query)
-                googlebooks_results = GoogleBooksClient.search_books(query)
-        except requests.Timeout:
-            logger.error(f"Timeout error while searching external APIs (timeout={timeout}s)")
-            return []
-        except requests.ConnectionError:
-            logger.error("Connection error while searching external APIs")
-            return []
-        
-        retry_count += 1
-        
-        # If we got results from either API, no need to retry
-        if openlibrary_results or googlebooks_results:
-            break
+            results[api_name] = future.result()
+        except Exception as e:
+            logger.error(f"Error while searching {api_name}: {e}")
+            results[api_name] = []
+            complete = False
+    return results['OpenLibrary'], results['Google Books'], complete
+
+@cache_external_results
+def search_external_apis(query: str, max_retries=2, timeout=10) -> Tuple[List[Dict[str, Any]], bool]:
+    """Search for books across all external APIs
+    
+    Transient failures are retried inside http_get, so each API is queried
+    once here and partial results are kept.
     
-    if not (openlibrary_results or googlebooks_results) and retry_count > max_retries:
-        logger.warning(f"Failed to get results from external APIs after {max_retries} retries")
-        return []
+    Args:
+        query: Search query string
+        max_retries: Kept for backwards compatibility; retries are handled
+            by http_get
+        timeout: Timeout in seconds for API requests (default: 10)
+        
+    Returns:
+        (books, complete): the combined list of book dictionaries from all
+        APIs with complete author information, and whether every API
+        answered. cache_external_results hands callers just the list
+    """
+    openlibrary_results, googlebooks_results, complete = query_external_apis(query, timeout=timeout)
+
+    if not (openlibrary_results or googlebooks_results):
+        logger.warning("No results from external APIs")
+        return [], complete
     
     # Merge and deduplicate results
     merged_results = merge_book_results(openlibrary_results, googlebooks_results)
     logger.info(f"Successfully merged {len(merged_results)} books from external APIs")
     
-    return merged_results
\ No newline at end of file
+    return merged_results, complete
@@ -0,0 +1,225 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Optional, Tuple, List
+from django.conf import settings
+from django.core.cache import cache
+from books.logging_config import logger
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class CacheManager:
+    """Manages caching operations for the search API."""
+    
+    CACHE_VERSION = '1.0'  # Increment this when cache structure changes
+    CACHE_PREFIX = f"{settings.CACHE_KEY_PREFIX}:search"
+    DEFAULT_TIMEOUT = 3600  # 1 hour
+    SHORT_TIMEOUT = 300    # 5 minutes
+    LONG_TIMEOUT = 86400   # 24 hours
+    LARGE_RESULT_COUNT = 1000
+    
+    # Search results are keyed on a generation counter that is bumped whenever
+    # books change (see books.signals), so every worker stops serving stale
+    # entries at once without scanning or deleting keys
+    GENERATION_KEY = f"{CACHE_PREFIX}:generation"
+    
+    # Per-process LRU in front of Redis for the most recent searches. Entries
+    # and the generation are only trusted briefly, since bumps from other
+    # workers don't clear this process's copy
+    LOCAL_MAX_ENTRIES = 1024
+    LOCAL_TIMEOUT = 30
+    GENERATION_LOCAL_TIMEOUT = 5
+    _local = OrderedDict()
+    _local_lock = threading.Lock()
+    _generation = (0.0, 0)
+    
+    # Per-key locks so concurrent misses for the same search run it once
+    _flights = {}
+    _flights_lock = threading.Lock()
+    
+    @classmethod
+    def get_generation(cls) -> int:
+        """Return the current search cache generation."""
+        expires_at, generation = cls._generation
+        if expires_at > time.monotonic():
+            return generation
+        try:
+            generation = cache.get(cls.GENERATION_KEY, 0, version=cls.CACHE_VERSION)
+        except Exception as e:
+            logger.error(f"Cache generation retrieval error: {e}", exc_info=True)
+            return 0
+        cls._generation = (time.monotonic() + cls.GENERATION_LOCAL_TIMEOUT, generation)
+        return generation
+    
+    @classmethod
+    def bump_generation(cls) -> None:
+        """Invalidate all cached search results by moving to a new generation."""
+        try:
+            try:
+                cache.incr(cls.GENERATION_KEY, version=cls.CACHE_VERSION)
+            except ValueError:
+                # Key missing (first bump or evicted)
+                cache.set(cls.GENERATION_KEY, 1, timeout=None, version=cls.CACHE_VERSION)
+        except Exception as e:
+            logger.error(f"Cache generation update error: {e}", exc_info=True)
+        with cls._local_lock:
+            cls._local.clear()
+            cls._generation = (0.0, 0)
+    
+    @classmethod
+    def generate_cache_key(cls, params: Dict[str, Any]) -> str:
+        """Generate a unique cache key for the search parameters."""
+        # Only the inputs the cached results depend on, in a fixed order;
+        # filter values are plain lists/strings/numbers so repr() is stable
+        filters = sorted((params.get('filters') or {}).items())
+        canonical = f"q={params['query']}|p={params['page']}|ps={params['page_size']}|f={filters}"
+        digest = hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+        return f"{cls.CACHE_PREFIX}:{cls.get_generation()}:{digest}"
+    
+    @classmethod
+    def _get_local(cls, cache_key: str) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        with cls._local_lock:
+            entry = cls._local.get(cache_key)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if expires_at < time.monotonic():
+                del cls._local[cache_key]
+                return None
+            cls._local.move_to_end(cache_key)
+            return data
+    
+    @classmethod
+    def _set_local(cls, cache_key: str, data: Tuple[List[Dict[str, Any]], int]) -> None:
+        with cls._local_lock:
+            cls._local[cache_key] = (time.monotonic() + cls.LOCAL_TIMEOUT, data)
+            cls._local.move_to_end(cache_key)
+            while len(cls._local) > cls.LOCAL_MAX_ENTRIES:
+                cls._local.popitem(last=False)
+    
+    @staticmethod
+    def _pack(data: Tuple[List[Dict[str, Any]], int]) -> Any:
+        # Results are JSON-shaped, so orjson bytes are smaller and much faster
+        # to (de)serialize than pickling the dicts
+        if orjson is None:
+            return data
+        return orjson.dumps(data, default=str)
+    
+    @staticmethod
+    def _unpack(raw: Any) -> Tuple[List[Dict[str, Any]], int]:
+        if isinstance(raw, bytes):
+            books, total_count = orjson.loads(raw)
+            return books, total_count
+        return raw
+    
+    @classmethod
+    def get_cached_results(cls, cache_key: str) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        """Get cached search results, checking the local LRU before Redis."""
+        cached_data = cls._get_local(cache_key)
+        if cached_data:
+            logger.debug(f"Local cache hit for key: {cache_key}")
+            return cached_data
+        try:
+            cached_data = cache.get(cache_key, version=cls.CACHE_VERSION)
+            if cached_data:
+                cached_data = cls._unpack(cached_data)
+                logger.info(f"Cache hit for key: {cache_key}")
+                cls._set_local(cache_key, cached_data)
+                return cached_data
+            logger.debug(f"Cache miss for key: {cache_key}")
+            return None
+        except Exception as e:
+            logger.error(f"Cache retrieval error: {e}", exc_info=True)
+            return None
+    
+    @classmethod
+    def set_cached_results(cls, cache_key: str, books: List[Dict[str, Any]], total_count: int) -> bool:
+        """Cache search results."""
+        cls._set_local(cache_key, (books, total_count))
+        # Empty results are mostly typos, worth keeping only briefly; broad
+        # queries are the most reused. Book changes invalidate all of them
+        # through the generation anyway.
+        if total_count == 0:
+            timeout = cls.SHORT_TIMEOUT
+        elif total_count > cls.LARGE_RESULT_COUNT:
+            timeout = cls.LONG_TIMEOUT
+        else:
+            timeout = cls.DEFAULT_TIMEOUT
+        try:
+            cache.set(
+                cache_key,
+                cls._pack((books, total_count)),
+                timeout=timeout,
+                version=cls.CACHE_VERSION
+            )
+            logger.info(f"Cached results for key: {cache_key}")
+            return True
+        except Exception as e:
+            logger.error(f"Cache storage error: {e}", exc_info=True)
+            return False
+    
+    @classmethod
+    def get_or_compute(cls, cache_key: str, compute: Callable[[], Tuple[List[Dict[str, Any]], int]]) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Return cached results for the key, or compute and cache them. Only
+        one thread per process computes a given key at a time; the others
+        wait and then read what it cached.
+        """
+        cached_data = cls.get_cached_results(cache_key)
+        if cached_data:
+            return cached_data
+        
+        with cls._flights_lock:
+            flight = cls._flights.setdefault(cache_key, [threading.Lock(), 0])
+            flight[1] += 1
+        try:
+            with flight[0]:
+                # Filled by the request we were waiting on
+                cached_data = cls._get_local(cache_key)
+                if cached_data:
+                    return cached_data
+                books, total_count = compute()
+                cls.set_cached_results(cache_key, books, total_count)
+                return books, total_count
+        finally:
+            with cls._flights_lock:
+                flight[1] -= 1
+                if not flight[1]:
+                    del cls._flights[cache_key]
+    
+    @classmethod
+    def invalidate_cache(cls) -> None:
+        """Invalidate all cached search results."""
+        # Entries are scoped to the generation, so moving to a new one drops
+        # them all in O(1) instead of scanning the keyspace for matches
+        cls.bump_generation()
+        logger.info("Invalidated search cache")
+    
+    @classmethod
+    def warm_cache(cls, common_queries: List[str]) -> None:
+        """Warm up the cache with common search queries."""
+        # The search service imports the models, which import this module
+        from books.utils.search_service import PostgreSQLSearchService
+        for query in common_queries:
+            try:
+                books, total_count = PostgreSQLSearchService.search_books(
+                    query=query,
+                    page=1,
+                    page_size=10
+                )
+                params = {
+                    'query': query,
+                    'page': 1,
+                    'page_size': 10,
+                    'filters': {}
+                }
+                cache_key = cls.generate_cache_key(params)
+                cls.set_cached_results(cache_key, books, total_count)
+                logger.info(f"Warmed cache for query: {query}")
+            except Exception as e:
+                logger.error(f"Cache warming error for query {query}: {e}", exc_info=True)
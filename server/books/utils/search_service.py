@@ -1,25 +1,89 @@
 from typing import List, Dict, Any, Optional, Tuple
-from django.db import models
-from django.contrib.postgres.search import SearchVector, SearchQuery, SearchRank
-from django.core.paginator import Paginator, EmptyPage
+from django.db import connection, models
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramDistance
+from django.core.paginator import Paginator
 from django.core.cache import cache
 from django.conf import settings
-from django.db.models import Q
+from django.db.models import Count, Exists, F, OuterRef, Prefetch, Q, Window
 from books.models import Book, Author, Genre
-from books.utils.external_api_clients import OpenLibraryClient, GoogleBooksClient, search_external_apis , merge_book_results
-from books.utils.book_service import save_external_book
+from books.utils.external_api_clients import query_external_apis, merge_book_results
+from books.utils.book_service import save_external_books
+from books.tasks import persist_external_books
 import logging
-import asyncio
-import aiohttp
+from collections import defaultdict
 from functools import lru_cache
-from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
 import hashlib
 import json
 from datetime import datetime, timedelta
 
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Book columns returned by the search endpoints (authors/genres are added separately)
+BOOK_DICT_FIELDS = (
+    'isbn13', 'isbn', 'title', 'cover_img', 'publication_date', 'number_of_pages',
+    'description', 'average_rate', 'source', 'last_updated'
+)
+_get_book_dict_fields = attrgetter(*BOOK_DICT_FIELDS)
+
+# Shorter queries are matched as title prefixes instead of full-text searched
+MIN_FTS_QUERY_LENGTH = 3
+
+# Below this many rows an exact COUNT(*) is cheap and the planner estimate
+# may be stale, so the estimate is only trusted for large tables
+BOOK_COUNT_ESTIMATE_MIN = 10000
+BOOK_COUNT_ESTIMATE_TIMEOUT = 60
+
+
+def _estimated_book_count() -> int:
+    """
+    Total number of books for unfiltered browsing, taken from the planner's
+    pg_class.reltuples estimate (refreshed by ANALYZE/autovacuum) instead of
+    a full COUNT(*) scan, and cached briefly.
+    """
+    cache_key = f"{settings.CACHE_KEY_PREFIX}:book_count_estimate"
+    count = cache.get(cache_key)
+    if count is None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [Book._meta.db_table]
+            )
+            row = cursor.fetchone()
+        count = row[0] if row else -1
+        # reltuples is -1 until the table is first analyzed
+        if count < BOOK_COUNT_ESTIMATE_MIN:
+            count = Book.objects.count()
+        cache.set(cache_key, count, BOOK_COUNT_ESTIMATE_TIMEOUT)
+    return count
+
+
+def _cache_digest(value: str) -> str:
+    """Hex digest for cache keys; xxh3 when available, md5 otherwise."""
+    if xxhash is not None:
+        return xxhash.xxh3_64_hexdigest(value)
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+@lru_cache(maxsize=128)
+def _build_search_query(normalized_query: str) -> SearchQuery:
+    return SearchQuery(normalized_query, search_type='websearch', config='english')
+
+
+def _search_query(query: str) -> SearchQuery:
+    """
+    Return the tsquery expression for a user query. websearch_to_tsquery
+    parses quotes, OR and -negation in Postgres and never errors on odd
+    input; hot queries reuse the already built expression.
+    """
+    return _build_search_query(' '.join(query.split()))
+
 
 class PostgreSQLSearchService:
     """
@@ -34,7 +98,7 @@ class PostgreSQLSearchService:
     #     if filters:
     #         key_parts.append(json.dumps(filters, sort_keys=True))
     #     key_string = ':'.join(key_parts)
-    #     return f"{settings.CACHE_KEY_PREFIX}:search:{hashlib.md5(key_string.encode()).hexdigest()}"
+    #     return f"{settings.CACHE_KEY_PREFIX}:search:{_cache_digest(key_string)}"
     
     # @staticmethod
     # def _update_recent_searches(query: str):
@@ -72,6 +136,11 @@ class PostgreSQLSearchService:
             page = 1
             page_size = 10
         
+        # Queries too short for useful full-text matching go to the title
+        # prefix index and never fall back to the external APIs
+        if len(query.strip()) < MIN_FTS_QUERY_LENGTH:
+            return PostgreSQLSearchService._search_title_prefix(query.strip(), page, page_size, filters)
+        
         # First try local database search
         books, total_count = PostgreSQLSearchService._search_local_database(query, page, page_size, filters)
         logger.info(f"Found {len(books)} books in local database for query: {query}")
@@ -139,26 +208,17 @@ class PostgreSQLSearchService:
         try:
             logger.debug(f"Searching local database with query: {query}")
             
-            # Create search vectors for different fields with different weights
-            search_vector = (
-                SearchVector('title', weight='A') +  # Highest weight for title
-                SearchVector('description', weight='B') +  # Medium weight for description
-                SearchVector('authors__name', weight='A') +  # High weight for author names
-                SearchVector('genres__name', weight='B') +  # Medium weight for genres
-                SearchVector('number_of_pages', weight='C')  # Lower weight for number of pages
-            )
-            
-            # Create search query with ranking
-            search_query = SearchQuery(query)
-
+            # Match against the stored search_vector column (kept up to date by
+            # database triggers) so the GIN index is used instead of building
+            # a vector for every row on each request
+            search_query = _search_query(query)
 
             # Base queryset with search and ranking
             queryset = Book.objects.annotate(
-                search=search_vector,
-                rank=SearchRank(search_vector, search_query)
+                rank=SearchRank(F('search_vector'), search_query)
             ).filter(
-                search=search_query
-            ).select_related().prefetch_related('authors', 'genres')
+                search_vector=search_query
+            )
             
             # Apply additional filters
             # if not filters:
@@ -168,25 +228,56 @@ class PostgreSQLSearchService:
             # Order by relevance (rank) and then by title
             queryset = queryset.order_by('-rank', 'title')
             
-            # Get total count
-            total_count = queryset.count()
-            logger.debug(f"Found {total_count} total results in local database")
-            
-            # Apply pagination
-            paginator = Paginator(queryset, page_size)
-            try:
-                page_obj = paginator.get_page(page)
-                # Convert to list of dictionaries
-                books = [PostgreSQLSearchService._book_to_dict(book) for book in page_obj.object_list]
-                return books, total_count
-            except EmptyPage:
-                logger.warning(f"Page {page} is out of range, returning empty result")
-                return [], total_count
+            return PostgreSQLSearchService._fetch_page(queryset, page, page_size)
             
         except Exception as e:
             logger.error(f"Database search error: {e}", exc_info=True)
             return [], 0
     
+    @staticmethod
+    def _search_title_prefix(query: str, page: int, page_size: int,
+                             filters: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Match very short queries against the start of book titles. Too short
+        to carry useful full-text lexemes, they are served by the UPPER(title)
+        trigram index instead of the FTS ranking pipeline.
+        """
+        try:
+            logger.debug(f"Searching title prefixes with short query: {query}")
+            queryset = Book.objects.filter(title__istartswith=query)
+            queryset = PostgreSQLSearchService._apply_filters(queryset, filters)
+            queryset = queryset.order_by('-average_rate', 'title')
+            return PostgreSQLSearchService._fetch_page(queryset, page, page_size)
+        except Exception as e:
+            logger.error(f"Title prefix search error: {e}", exc_info=True)
+            return [], 0
+    
+    @staticmethod
+    def _fetch_page(queryset, page: int, page_size: int) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Fetch one page of book dictionaries and the total match count in one
+        query: the count comes from a window over the full match set, so the
+        match conditions are only evaluated once.
+        """
+        start = (page - 1) * page_size
+        rows = list(
+            queryset.annotate(total_count=Window(expression=Count('*')))
+            .values(*BOOK_DICT_FIELDS, 'total_count')[start:start + page_size]
+        )
+        if not rows:
+            if page == 1:
+                return [], 0
+            logger.warning(f"Page {page} is out of range, returning empty result")
+            return [], queryset.count()
+        
+        total_count = rows[0]['total_count']
+        logger.debug(f"Found {total_count} total results in local database")
+        for row in rows:
+            del row['total_count']
+        
+        # Convert to list of dictionaries
+        return PostgreSQLSearchService._rows_to_dicts(rows), total_count
+    
     @staticmethod
     def _search_external_apis_parallel(query: str, page: int, page_size: int) -> Tuple[List[Dict[str, Any]], int]:
         """
@@ -195,59 +286,39 @@ class PostgreSQLSearchService:
         try:
             logger.info(f"Starting parallel external API search for query: {query}")
             
-            # Create event loop for async operations
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            async def search_all_apis():
-                try:
-                    # Search both APIs concurrently with page_size
-                    openlibrary_task = asyncio.create_task(
-                        asyncio.to_thread(OpenLibraryClient.search_books, query, page_size)
-                    )
-                    googlebooks_task = asyncio.create_task(
-                        asyncio.to_thread(GoogleBooksClient.search_books, query, page_size)
-                    )
-                    
-                    # Wait for both tasks to complete
-                    openlibrary_results, googlebooks_results = await asyncio.gather(
-                        openlibrary_task, googlebooks_task
-                    )
-                    
-                    # Merge and deduplicate results using merge_book_results
-                    merged_results = merge_book_results(openlibrary_results, googlebooks_results)
-                    logger.info(f"Retrieved and merged {len(merged_results)} results from external APIs")
-                    
-                    return merged_results
-                    
-                except Exception as e:
-                    logger.error(f"Error in async external API search: {e}", exc_info=True)
-                    return []
-            
-            # Run the async search
-            external_books = loop.run_until_complete(search_all_apis())
-            loop.close()
-            
-            if external_books:
-                logger.info(f"Saving {len(external_books)} external books to database")
-                # Save external books to database in parallel
-                with ThreadPoolExecutor(max_workers=4) as executor:
-                    executor.map(save_external_book, external_books)
-                
-                logger.debug("Cached external search results")
+            # Fan out to both APIs on the shared external API pool, asking
+            # each for just this page via its own offset parameter
+            offset = (page - 1) * page_size
+            openlibrary_results, googlebooks_results, _ = query_external_apis(
+                query, page_size, offset=offset
+            )
             
-            # Apply pagination to merged results
-            total_count = len(external_books)
-            start_idx = (page - 1) * page_size
-            end_idx = start_idx + page_size
+            # Merge and deduplicate results using merge_book_results
+            external_books = merge_book_results(openlibrary_results, googlebooks_results)
+            logger.info(f"Retrieved and merged {len(external_books)} results from external APIs")
             
-            # Handle out of range pages
-            if start_idx >= total_count:
+            if not external_books:
+                if page == 1:
+                    logger.info(f"No external results for query: {query}")
+                    return [], 0
+                # Earlier pages had results, so report what has been seen
                 logger.warning(f"Page {page} is out of range for external results")
-                return [], total_count
+                return [], offset
             
-            # Get the paginated slice of results
-            paginated_books = external_books[start_idx:end_idx]
+            logger.info(f"Saving {len(external_books)} external books to database")
+            # Persist in the background so the response doesn't wait on
+            # the inserts; fall back to one bulk save if Celery is down
+            try:
+                persist_external_books.delay(external_books)
+            except Exception as e:
+                logger.error(f"Failed to queue external book persistence: {e}")
+                save_external_books(external_books)
+            
+            # The APIs already returned this page; merging both can yield up
+            # to two pages' worth, so trim to the requested size. The upstream
+            # total is unknown, so report what has been seen so far
+            paginated_books = external_books[:page_size]
+            total_count = offset + len(external_books)
             logger.info(f"Returning {len(paginated_books)} paginated results from external APIs")
             return paginated_books, total_count
             
@@ -262,7 +333,7 @@ class PostgreSQLSearchService:
         """
         try:
             logger.debug("Getting all books with filters")
-            queryset = Book.objects.select_related().prefetch_related('authors', 'genres')
+            queryset = Book.objects.all()
             
             # Apply filters
             if filters:
@@ -272,16 +343,18 @@ class PostgreSQLSearchService:
             # Order by average rating and title
             queryset = queryset.order_by('-average_rate', 'title')
             
-            # Get total count
-            total_count = queryset.count()
+            # Get total count; browsing everything uses the planner estimate
+            # rather than scanning the whole table
+            total_count = queryset.count() if filters else _estimated_book_count()
             logger.debug(f"Found {total_count} total books")
             
-            # Apply pagination
-            paginator = Paginator(queryset, page_size)
+            # Apply pagination, reusing the count instead of running it again
+            paginator = Paginator(queryset.values(*BOOK_DICT_FIELDS), page_size)
+            paginator.count = total_count
             page_obj = paginator.get_page(page)
             
             # Convert to list of dictionaries
-            books = [PostgreSQLSearchService._book_to_dict(book) for book in page_obj.object_list]
+            books = PostgreSQLSearchService._rows_to_dicts(page_obj.object_list)
             
             return books, total_count
             
@@ -294,9 +367,16 @@ class PostgreSQLSearchService:
         """
         Apply filters to the queryset.
         """
+        if not filters:
+            return queryset
         try:
+            # M2M filters use EXISTS subqueries rather than joins, so a book
+            # matching several genres/authors is not returned (and counted)
+            # once per match
             if 'genres' in filters:
-                queryset = queryset.filter(genres__name__in=filters['genres'])
+                queryset = queryset.filter(Exists(Book.genres.through.objects.filter(
+                    book_id=OuterRef('pk'), genre__name__in=filters['genres']
+                )))
                 logger.debug(f"Applied genre filter: {filters['genres']}")
             
             # Filter by minimum rating
@@ -316,7 +396,9 @@ class PostgreSQLSearchService:
             
 
             if 'author' in filters:
-                queryset = queryset.filter(authors__name__in = filters['author'])
+                queryset = queryset.filter(Exists(Book.authors.through.objects.filter(
+                    book_id=OuterRef('pk'), author__name__in=filters['author']
+                )))
                 logger.debug(f"Applied author filter: {filters['author']}")
             
             # Filter by number of pages
@@ -332,27 +414,48 @@ class PostgreSQLSearchService:
             return queryset
     
     @staticmethod
-    @lru_cache(maxsize=1000)
+    def _rows_to_dicts(rows) -> List[Dict[str, Any]]:
+        """
+        Convert Book `.values()` rows to dictionaries shaped like _book_to_dict.
+        Author and genre names for the whole page are fetched with one query
+        each instead of per book.
+        """
+        rows = list(rows)
+        book_ids = [row['isbn13'] for row in rows]
+        authors = defaultdict(list)
+        for book_id, name in Book.authors.through.objects.filter(
+            book_id__in=book_ids
+        ).order_by('id').values_list('book_id', 'author__name'):
+            authors[book_id].append(name)
+        genres = defaultdict(list)
+        for book_id, name in Book.genres.through.objects.filter(
+            book_id__in=book_ids
+        ).order_by('id').values_list('book_id', 'genre__name'):
+            genres[book_id].append(name)
+        
+        for row in rows:
+            row['authors'] = authors[row['isbn13']]
+            row['genres'] = genres[row['isbn13']]
+            row['average_rate'] = float(row['average_rate']) if row['average_rate'] else None
+            row['last_updated'] = row['last_updated'].isoformat() if row['last_updated'] else None
+        return rows
+    
+    @staticmethod
     def _book_to_dict(book) -> Dict[str, Any]:
         """
         Convert a Book model instance to a dictionary.
-        Cached for better performance.
         """
         try:
-            return {
-                'isbn13': book.isbn13,
-                'isbn': book.isbn,
-                'title': book.title,
-                'authors': [author.name for author in book.authors.all()],
-                'cover_img': book.cover_img,
-                'publication_date': book.publication_date,
-                'number_of_pages': book.number_of_pages,
-                'description': book.description,
-                'average_rate': float(book.average_rate) if book.average_rate else None,
-                'genres': [genre.name for genre in book.genres.all()],
-                'source': book.source,
-                'last_updated': book.last_updated.isoformat() if book.last_updated else None
-            }
+            book_dict = dict(zip(BOOK_DICT_FIELDS, _get_book_dict_fields(book)))
+            book_dict['authors'] = [author.name for author in book.authors.all()]
+            book_dict['genres'] = [genre.name for genre in book.genres.all()]
+            if book_dict['average_rate']:
+                book_dict['average_rate'] = float(book_dict['average_rate'])
+            else:
+                book_dict['average_rate'] = None
+            if book_dict['last_updated']:
+                book_dict['last_updated'] = book_dict['last_updated'].isoformat()
+            return book_dict
         except Exception as e:
             logger.error(f"Error converting book to dictionary: {e}", exc_info=True)
             return {}
@@ -361,23 +464,23 @@ class PostgreSQLSearchService:
     def get_suggestions(query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
         Get book title suggestions based on partial query.
-        Includes caching for better performance.
+        Callers cache the finished response (see BookSuggestionAPIView).
         """
         if not query.strip():
             return []
         
-        cache_key = f"{settings.CACHE_KEY_PREFIX}:suggestions:{hashlib.md5(query.encode()).hexdigest()}"
-        cached_suggestions = cache.get(cache_key)
-        if cached_suggestions:
-            logger.debug(f"Cache hit for suggestions: {query}")
-            return cached_suggestions
-        
         try:
             logger.debug(f"Getting suggestions for query: {query}")
-            # Search for books with titles that start with the query
+            # Search for books with titles that start with the query; served by
+            # the UPPER(title) trigram index, loading only what typeahead shows.
+            # Closest titles first, so "dune" ranks "Dune" above "Dune Messiah"
             books = Book.objects.filter(
                 title__istartswith=query
-            ).select_related().prefetch_related('authors')[:limit]
+            ).order_by(
+                TrigramDistance('title', query), '-average_rate', 'title'
+            ).only('isbn13', 'title', 'cover_img').prefetch_related(
+                Prefetch('authors', queryset=Author.objects.only('author_id', 'name'))
+            )[:limit]
             
             suggestions = []
             for book in books:
@@ -388,8 +491,6 @@ class PostgreSQLSearchService:
                     'cover_img': book.cover_img
                 })
             
-            # Cache suggestions for 5 minutes
-            cache.set(cache_key, suggestions, 300)
             logger.debug(f"Found {len(suggestions)} suggestions")
             return suggestions
             
@@ -1,16 +1,38 @@
+import json
+
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from users.views.profile import IsOwnerOrReadOnly
 from rest_framework.views import APIView
+from rest_framework.utils.encoders import JSONEncoder
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Prefetch, Q
 from django.contrib.auth import get_user_model
 
-from books.models import ReadingList, Book
+from books.models import ReadingList, ReadingListBooks, Book
 from books.serializers.book_serializers import ReadingListSerializer
 
 
+def with_serializer_relations(queryset):
+    """
+    Load everything ReadingListSerializer reads up front: the owner's username,
+    and the books with their authors, genres and review counts, so listing
+    lists doesn't issue queries per list and per book.
+    """
+    return queryset.select_related('profile__user').prefetch_related(
+        Prefetch(
+            'books',
+            # Meta.ordering is ignored on aggregated querysets, so restate it
+            queryset=Book.objects.annotate(reviews_total=Count('reviews'))
+            .order_by(*Book._meta.ordering)
+            .prefetch_related('authors', 'genres')
+        )
+    )
+
+
 class ReadingListAPIView(generics.ListAPIView):
     """
     API endpoint that allows reading lists to be viewed.
@@ -20,10 +42,12 @@ class ReadingListAPIView(generics.ListAPIView):
 
     def get_queryset(self):
         if self.request.user.is_authenticated:
-            return ReadingList.objects.filter(
+            queryset = ReadingList.objects.filter(
                 Q(profile__user=self.request.user)
             ).order_by('-created_at')
-        return ReadingList.objects.filter(privacy='public').order_by('-created_at')
+        else:
+            queryset = ReadingList.objects.filter(privacy='public').order_by('-created_at')
+        return with_serializer_relations(queryset)
 
 
 
@@ -38,10 +62,12 @@ class ReadingListDetailAPIView(generics.RetrieveAPIView):
     
     def get_queryset(self):
         if self.request.user.is_authenticated:
-            return ReadingList.objects.filter(
+            queryset = ReadingList.objects.filter(
                 Q(privacy='public') | Q(profile__user=self.request.user)
             )
-        return ReadingList.objects.filter(privacy='public')
+        else:
+            queryset = ReadingList.objects.filter(privacy='public')
+        return with_serializer_relations(queryset)
 
 
 
@@ -106,23 +132,29 @@ class ReadingListBookOperationsAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        book = get_object_or_404(Book, isbn13=book_id)
+        book = get_object_or_404(Book.objects.only('isbn13', 'title'), isbn13=book_id)
         reading_list = get_object_or_404(
-            ReadingList, 
+            ReadingList.objects.only('list_id', 'name'), 
             list_id=list_id, 
             profile__user=request.user
         )
         
-        # Add book to reading list if not already there
-        if not reading_list.books.filter(isbn13=book_id).exists():
-            reading_list.books.add(book)
+        # Add book to reading list with a single insert on the through table
+        # (as books.add() would, without its lookup); the unique constraint
+        # rejects a book that is already there, including concurrent adds
+        try:
+            with transaction.atomic():
+                ReadingListBooks.objects.bulk_create([
+                    ReadingListBooks(readinglist_id=reading_list.list_id, book_id=book.isbn13)
+                ])
+        except IntegrityError:
             return Response(
-                {"message": f'Added "{book.title}" to "{reading_list.name}"'}, 
+                {"message": f'This book is already in "{reading_list.name}"'}, 
                 status=status.HTTP_200_OK
             )
         
         return Response(
-            {"message": f'This book is already in "{reading_list.name}"'}, 
+            {"message": f'Added "{book.title}" to "{reading_list.name}"'}, 
             status=status.HTTP_200_OK
         )
 
@@ -139,16 +171,18 @@ class ReadingListBookOperationsAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        book = get_object_or_404(Book, isbn13=book_id)
+        book = get_object_or_404(Book.objects.only('isbn13', 'title'), isbn13=book_id)
         reading_list = get_object_or_404(
-            ReadingList, 
+            ReadingList.objects.only('list_id', 'name'), 
             list_id=list_id, 
             profile__user=request.user
         )
         
-        # Remove book from reading list
-        if reading_list.books.filter(isbn13=book_id).exists():
-            reading_list.books.remove(book)
+        # Remove book from reading list with a single DELETE on the through table
+        deleted, _ = ReadingListBooks.objects.filter(
+            readinglist_id=reading_list.list_id, book_id=book.isbn13
+        ).delete()
+        if deleted:
             return Response(
                 {"message": f'Removed "{book.title}" from "{reading_list.name}"'}, 
                 status=status.HTTP_200_OK
@@ -167,11 +201,35 @@ class AdminUserReadingListsAPIView(generics.ListAPIView):
     """
     serializer_class = ReadingListSerializer
     permission_classes = [IsAuthenticated]
+    STREAM_CHUNK_SIZE = 200
     
     def get_queryset(self):
         user_id = self.kwargs.get('user_id')
         user = get_object_or_404(get_user_model(), id=user_id)
-        return ReadingList.objects.filter(profile__user=user).order_by('-created_at')
+        return with_serializer_relations(
+            ReadingList.objects.filter(profile__user=user).order_by('-created_at')
+        )
+
+    def list(self, request, *args, **kwargs):
+        """
+        Stream the lists as a JSON array, loading and serializing them in
+        chunks so memory stays flat however many lists the user has.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(
+            self._stream_lists(queryset), content_type='application/json'
+        )
+
+    def _stream_lists(self, queryset):
+        yield '['
+        # iterator() runs the prefetches once per chunk of lists
+        lists = queryset.iterator(chunk_size=self.STREAM_CHUNK_SIZE)
+        for index, reading_list in enumerate(lists):
+            data = self.get_serializer(reading_list).data
+            yield (',' if index else '') + json.dumps(
+                data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')
+            )
+        yield ']'
 
 
 # class UserReadingListsAPIView(generics.ListAPIView):
@@ -2,45 +2,119 @@ from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
 from rest_framework.views import APIView
+from rest_framework.pagination import CursorPagination
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db import IntegrityError, transaction
+from django.db.models import OuterRef, Q, Subquery
 from django.contrib.auth import get_user_model
 
-from books.models import BookReview, BookRating, Book
+from books.models import BookReview, BookRating, Book, ReviewVote
 from books.serializers.review_serializers import BookReviewSerializer, BookRatingSerializer
 
 
+def with_review_relations(queryset, request):
+    """
+    Load everything BookReviewSerializer reads up front: the reviewer with
+    their profile, the book, and the requesting user's vote, so listing
+    reviews doesn't issue queries per review.
+    """
+    queryset = queryset.select_related('user__profile', 'book').only(
+        'review_id', 'review_text', 'created_at', 'updated_at',
+        'upvotes_count', 'downvotes_count',
+        'user__username', 'user__profile__profile_pic',
+        'book__title', 'book__cover_img',
+    )
+    if request.user.is_authenticated:
+        queryset = queryset.annotate(
+            current_user_vote=Subquery(
+                ReviewVote.objects.filter(
+                    review=OuterRef('pk'), user=request.user
+                ).values('vote_type')[:1]
+            )
+        )
+    return queryset
+
+
+# (sort_by, order) -> ORDER BY for review lists. Unknown values fall back to
+# created_at and desc, matching the BookReview indexes.
+REVIEW_ORDERINGS = {
+    ('upvotes', 'asc'): ('upvotes_count', '-created_at'),
+    ('upvotes', 'desc'): ('-upvotes_count', '-created_at'),
+    ('created_at', 'asc'): ('created_at',),
+    ('created_at', 'desc'): ('-created_at',),
+}
+
+
+def order_reviews(queryset, request):
+    """Apply the `sort_by`/`order` query parameters to a review queryset."""
+    sort_by = request.query_params.get('sort_by', 'created_at')
+    order = request.query_params.get('order', 'desc')
+    key = (
+        'upvotes' if sort_by == 'upvotes' else 'created_at',
+        'asc' if order == 'asc' else 'desc',
+    )
+    return queryset.order_by(*REVIEW_ORDERINGS[key])
+
+
+def int_query_param(request, name, default, lo, hi=None):
+    """
+    Read an integer query parameter clamped to [lo, hi]. Values that aren't
+    integers are rejected with a 400 instead of surfacing as a 500.
+    """
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    try:
+        value = max(lo, int(value))
+    except ValueError:
+        raise ValidationError({name: 'Must be an integer'})
+    return value if hi is None else min(value, hi)
+
+
+class ReviewCursorPagination(CursorPagination):
+    """
+    Keyset pagination for review lists, seeking past the last row seen on the
+    list's own ordering instead of counting through an OFFSET. Only used when
+    the client asks for it with `cursor` or `page_size`; otherwise the full
+    list is returned as before.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at',)
+    
+    def get_ordering(self, request, queryset, view):
+        return tuple(queryset.query.order_by) or self.ordering
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+def with_rating_relations(queryset):
+    """
+    Load the user and book BookRatingSerializer reads for every rating,
+    limited to the columns it shows.
+    """
+    return queryset.select_related('user', 'book').only(
+        'rate_id', 'rate', 'created_at',
+        'user__username', 'book__title', 'book__average_rate',
+    )
+
+
 class BookReviewAPIView(generics.ListAPIView):
     """
     API endpoint that allows book reviews to be viewed.
     Returns all reviews with sorting options.
     """
     serializer_class = BookReviewSerializer
+    pagination_class = ReviewCursorPagination
     
     def get_queryset(self):
-        queryset = BookReview.objects.all()
-        
-        # Add sorting options
-        sort_by = self.request.query_params.get('sort_by', 'created_at')
-        order = self.request.query_params.get('order', 'desc')
-        
-        if sort_by == 'upvotes':
-            if order == 'asc':
-                queryset = queryset.order_by('upvotes_count', '-created_at')
-            else:
-                queryset = queryset.order_by('-upvotes_count', '-created_at')
-        else:  # default to created_at
-            if order == 'asc':
-                queryset = queryset.order_by('created_at')
-            else:
-                queryset = queryset.order_by('-created_at')
-        
-        return queryset
-    
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context['request'] = self.request
-        return context
+        queryset = with_review_relations(BookReview.objects.all(), self.request)
+        return order_reviews(queryset, self.request)
 
 
 class BookReviewDetailAPIView(generics.RetrieveAPIView):
@@ -51,7 +125,7 @@ class BookReviewDetailAPIView(generics.RetrieveAPIView):
     lookup_field = 'review_id'
     
     def get_queryset(self):
-        return BookReview.objects.all()
+        return with_review_relations(BookReview.objects.all(), self.request)
 
 
 class BookReviewCreateAPIView(APIView):
@@ -70,34 +144,34 @@ class BookReviewCreateAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
             
-        # Check if book exists
-        try:
-            book = Book.objects.get(isbn13=book_id)
-        except Book.DoesNotExist:
+        # Validating the book field is the existence check
+        serializer = BookReviewSerializer(data=request.data)
+        if not serializer.is_valid():
+            book_errors = serializer.errors.get('book', [])
+            if any(getattr(error, 'code', None) == 'does_not_exist' for error in book_errors):
+                return Response(
+                    {'error': 'Book does not exist'}, 
+                    status=status.HTTP_404_NOT_FOUND
+                )
             return Response(
-                {'error': 'Book does not exist'}, 
-                status=status.HTTP_404_NOT_FOUND
+                serializer.errors, 
+                status=status.HTTP_400_BAD_REQUEST
             )
             
-        # Check if user has already reviewed this book
-        if BookReview.objects.filter(user=request.user, book=book).exists():
+        # Create the review with a single INSERT; the unique constraint on
+        # (user, book) rejects a second review, including concurrent ones
+        try:
+            with transaction.atomic():
+                serializer.save(user=request.user)
+        except IntegrityError:
             return Response(
                 {'error': 'You have already reviewed this book'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
             
-        # Validate and create review
-        serializer = BookReviewSerializer(data=request.data)
-        if serializer.is_valid():
-            serializer.save(user=request.user, book=book)
-            return Response(
-                serializer.data, 
-                status=status.HTTP_201_CREATED
-            )
-            
         return Response(
-            serializer.errors, 
-            status=status.HTTP_400_BAD_REQUEST
+            serializer.data, 
+            status=status.HTTP_201_CREATED
         )
 
 class BookReviewUpdateAPIView(generics.UpdateAPIView):
@@ -110,7 +184,21 @@ class BookReviewUpdateAPIView(generics.UpdateAPIView):
     lookup_field = 'review_id'
     
     def get_queryset(self):
-        return BookReview.objects.filter(user=self.request.user)
+        return with_review_relations(
+            BookReview.objects.filter(user=self.request.user), self.request
+        )
+    
+    def update(self, request, *args, **kwargs):
+        # The serializer leaves (user, book) uniqueness to the database, so
+        # moving a review onto a book the user already reviewed fails here
+        try:
+            with transaction.atomic():
+                return super().update(request, *args, **kwargs)
+        except IntegrityError:
+            return Response(
+                {'error': 'You have already reviewed this book'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
 
 class BookReviewDeleteAPIView(generics.DestroyAPIView):
@@ -132,36 +220,14 @@ class BookReviewsByBookAPIView(generics.ListAPIView):
     Supports sorting by creation date or upvotes.
     """
     serializer_class = BookReviewSerializer
+    pagination_class = ReviewCursorPagination
     
     def get_queryset(self):
         book_id = self.kwargs.get('book_id')
-        try:
-            book = Book.objects.get(isbn13=book_id)
-            queryset = BookReview.objects.filter(book=book)
-            
-            # Add sorting options
-            sort_by = self.request.query_params.get('sort_by', 'created_at')
-            order = self.request.query_params.get('order', 'desc')
-            
-            if sort_by == 'upvotes':
-                if order == 'asc':
-                    queryset = queryset.order_by('upvotes_count', '-created_at')
-                else:
-                    queryset = queryset.order_by('-upvotes_count', '-created_at')
-            else:  # default to created_at
-                if order == 'asc':
-                    queryset = queryset.order_by('created_at')
-                else:
-                    queryset = queryset.order_by('-created_at')
-            
-            return queryset
-        except Book.DoesNotExist:
+        if not Book.objects.filter(isbn13=book_id).exists():
             raise ValidationError({'book': 'Book does not exist'})
-    
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context['request'] = self.request
-        return context
+        queryset = with_review_relations(BookReview.objects.filter(book_id=book_id), self.request)
+        return order_reviews(queryset, self.request)
 
 
 class BookRatingAPIView(generics.ListAPIView):
@@ -172,7 +238,7 @@ class BookRatingAPIView(generics.ListAPIView):
     serializer_class = BookRatingSerializer
     
     def get_queryset(self):
-        return BookRating.objects.all().order_by('-created_at')
+        return with_rating_relations(BookRating.objects.all()).order_by('-created_at')
 
 
 class BookRatingDetailAPIView(generics.RetrieveAPIView):
@@ -183,7 +249,7 @@ class BookRatingDetailAPIView(generics.RetrieveAPIView):
     lookup_field = 'rate_id'
     
     def get_queryset(self):
-        return BookRating.objects.all()
+        return with_rating_relations(BookRating.objects.all())
 
 
 
@@ -196,12 +262,8 @@ class BookRatingCreateAPIView(generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def perform_create(self, serializer):
-        book_id = self.request.data.get('book')
-        try:
-            book = Book.objects.get(isbn13=book_id)
-            serializer.save(user=self.request.user, book=book)
-        except Book.DoesNotExist:
-            raise ValidationError({'book': 'Book does not exist'})
+        # The book was already loaded while validating the book field
+        serializer.save(user=self.request.user)
 
 
 
@@ -215,23 +277,11 @@ class BookRatingUpdateAPIView(generics.UpdateAPIView):
     lookup_field = 'rate_id'
     
     def get_queryset(self):
-        return BookRating.objects.filter(user=self.request.user)
+        return with_rating_relations(BookRating.objects.filter(user=self.request.user))
     
     def perform_update(self, serializer):
+        # The serializer's update() folds the change into the book's stats
         serializer.save()
-        
-        # Recalculate average rating for the book
-        book = serializer.instance.book
-        book_ratings = BookRating.objects.filter(book=book)
-        book.number_of_ratings = book_ratings.count()
-        
-        if book.number_of_ratings > 0:
-            total_rating = sum(br.rate for br in book_ratings)
-            book.average_rate = total_rating / book.number_of_ratings
-        else:
-            book.average_rate = None
-        
-        book.save()
 
 
 class BookRatingDeleteAPIView(generics.DestroyAPIView):
@@ -247,21 +297,15 @@ class BookRatingDeleteAPIView(generics.DestroyAPIView):
         return BookRating.objects.filter(user=self.request.user)
     
     def perform_destroy(self, instance):
-        # Store book reference before deletion
-        book = instance.book
-        instance.delete()
-        
-        # Recalculate average rating
-        book_ratings = BookRating.objects.filter(book=book)
-        book.number_of_ratings = book_ratings.count()
-        
-        if book.number_of_ratings > 0:
-            total_rating = sum(br.rate for br in book_ratings)
-            book.average_rate = total_rating / book.number_of_ratings
-        else:
-            book.average_rate = None
-        
-        book.save()
+        # Only the key is needed to update the stats; skip loading the book
+        book = Book(pk=instance.book_id)
+        with transaction.atomic():
+            deleted, _ = instance.delete()
+            
+            # Remove the rating from the book's average, unless a concurrent
+            # request already deleted it
+            if deleted:
+                book.apply_rating_change(-1, -instance.rate)
 
 
 class BookRatingsByBookAPIView(generics.ListAPIView):
@@ -272,11 +316,9 @@ class BookRatingsByBookAPIView(generics.ListAPIView):
     
     def get_queryset(self):
         book_id = self.kwargs.get('book_id')
-        try:
-            book = Book.objects.get(isbn13=book_id)
-            return BookRating.objects.filter(book=book).order_by('-created_at')
-        except Book.DoesNotExist:
+        if not Book.objects.filter(isbn13=book_id).exists():
             raise ValidationError({'book': 'Book does not exist'})
+        return with_rating_relations(BookRating.objects.filter(book_id=book_id)).order_by('-created_at')
 
 
 class UserBookRatingAPIView(generics.RetrieveAPIView):
@@ -289,14 +331,15 @@ class UserBookRatingAPIView(generics.RetrieveAPIView):
     
     def get_object(self):
         book_id = self.kwargs.get('book_id')
-        try:
-            book = Book.objects.get(isbn13=book_id)
-            rating = BookRating.objects.filter(book=book, user=self.request.user).first()
-            if not rating:
-                raise ValidationError({'rating': 'You have not rated this book yet'})
+        rating = with_rating_relations(
+            BookRating.objects.filter(book_id=book_id, user=self.request.user)
+        ).first()
+        if rating:
             return rating
-        except Book.DoesNotExist:
+        # Only a miss needs to tell an unknown book from an unrated one
+        if not Book.objects.filter(isbn13=book_id).exists():
             raise ValidationError({'book': 'Book does not exist'})
+        raise ValidationError({'rating': 'You have not rated this book yet'})
         
 
 class UserRatingsAPIView(generics.ListAPIView):
@@ -316,11 +359,11 @@ class UserRatingsAPIView(generics.ListAPIView):
         
         # If user is looking at their own ratings, return all
         if self.request.user.id == int(user_id):
-            return BookRating.objects.filter(user=user).order_by('-created_at')
+            return with_rating_relations(BookRating.objects.filter(user=user)).order_by('-created_at')
         
         # Otherwise, only return public ratings (if you have a public flag) 
         # or all ratings if all are public by default
-        return BookRating.objects.filter(user=user).order_by('-created_at')
+        return with_rating_relations(BookRating.objects.filter(user=user)).order_by('-created_at')
     
 
 
@@ -334,6 +377,7 @@ class UserReviewsAPIView(generics.ListAPIView):
     """
     serializer_class = BookReviewSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ReviewCursorPagination
 
 
     def get_queryset(self):
@@ -341,6 +385,8 @@ class UserReviewsAPIView(generics.ListAPIView):
         
         try:
             user = get_user_model().objects.get(id=user_id)
-            return BookReview.objects.filter(user=user).order_by('-created_at')
+            return with_review_relations(
+                BookReview.objects.filter(user=user), self.request
+            ).order_by('-created_at')
         except get_user_model().DoesNotExist:
             return BookReview.objects.none()  # Return empty queryset if user not found
\ No newline at end of file
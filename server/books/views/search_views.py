@@ -2,104 +2,28 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.throttling import UserRateThrottle
-from django.core.cache import cache
-from django.conf import settings
 from books.models import Book
 from books.utils.search_service import PostgreSQLSearchService
+from books.utils.search_cache import CacheManager
 from books.utils.external_api_clients import search_external_apis
 from books.utils.book_normalizer import BookNormalizer
 from books.logging_config import logger
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, Tuple, List
-import hashlib
-import json
+from BookNest.renderers import ORJSONRenderer
+from datetime import date, timedelta
+from typing import Dict, Any, Optional, Tuple
 from functools import lru_cache
 from django.core.cache.backends.base import DEFAULT_TIMEOUT
 from rest_framework.exceptions import Throttled
 from django.core.exceptions import ValidationError
 
-class CacheManager:
-    """Manages caching operations for the search API."""
-    
-    CACHE_VERSION = '1.0'  # Increment this when cache structure changes
-    CACHE_PREFIX = f"{settings.CACHE_KEY_PREFIX}:search"
-    DEFAULT_TIMEOUT = 3600  # 1 hour
-    SHORT_TIMEOUT = 300    # 5 minutes
-    LONG_TIMEOUT = 86400   # 24 hours
-    
-    @classmethod
-    def generate_cache_key(cls, params: Dict[str, Any]) -> str:
-        """Generate a unique cache key for the search parameters."""
-        # Sort parameters to ensure consistent key generation
-        sorted_params = json.dumps(params, sort_keys=True)
-        return f"{cls.CACHE_PREFIX}:{hashlib.md5(sorted_params.encode()).hexdigest()}"
-    
-    @classmethod
-    def get_cached_results(cls, cache_key: str) -> Optional[Tuple[List[Dict[str, Any]], int]]:
-        """Get cached search results."""
-        try:
-            cached_data = cache.get(cache_key, version=cls.CACHE_VERSION)
-            if cached_data:
-                logger.info(f"Cache hit for key: {cache_key}")
-                return cached_data
-            logger.debug(f"Cache miss for key: {cache_key}")
-            return None
-        except Exception as e:
-            logger.error(f"Cache retrieval error: {e}", exc_info=True)
-            return None
-    
-    @classmethod
-    def set_cached_results(cls, cache_key: str, books: List[Dict[str, Any]], total_count: int) -> bool:
-        """Cache search results."""
-        try:
-            cache.set(
-                cache_key,
-                (books, total_count),
-                timeout=cls.DEFAULT_TIMEOUT,
-                version=cls.CACHE_VERSION
-            )
-            logger.info(f"Cached results for key: {cache_key}")
-            return True
-        except Exception as e:
-            logger.error(f"Cache storage error: {e}", exc_info=True)
-            return False
-    
-    @classmethod
-    def invalidate_cache(cls, pattern: str = None) -> None:
-        """Invalidate cache entries matching the pattern."""
-        try:
-            if pattern:
-                keys = cache.keys(f"{cls.CACHE_PREFIX}:{pattern}*")
-            else:
-                keys = cache.keys(f"{cls.CACHE_PREFIX}:*")
-            
-            for key in keys:
-                cache.delete(key, version=cls.CACHE_VERSION)
-            logger.info(f"Invalidated {len(keys)} cache entries")
-        except Exception as e:
-            logger.error(f"Cache invalidation error: {e}", exc_info=True)
-    
-    @classmethod
-    def warm_cache(cls, common_queries: List[str]) -> None:
-        """Warm up the cache with common search queries."""
-        for query in common_queries:
-            try:
-                books, total_count = PostgreSQLSearchService.search_books(
-                    query=query,
-                    page=1,
-                    page_size=10
-                )
-                params = {
-                    'query': query,
-                    'page': 1,
-                    'page_size': 10,
-                    'filters': {}
-                }
-                cache_key = cls.generate_cache_key(params)
-                cls.set_cached_results(cache_key, books, total_count)
-                logger.info(f"Warmed cache for query: {query}")
-            except Exception as e:
-                logger.error(f"Cache warming error for query {query}: {e}", exc_info=True)
+TRUE_VALUES = frozenset({'true', '1', 'yes'})
+
+
+@lru_cache(maxsize=1024)
+def _split_csv(value: str) -> Tuple[str, ...]:
+    """Split a comma-separated filter into its non-blank, stripped items."""
+    return tuple(item.strip() for item in value.split(',') if item.strip())
+
 
 class SearchRateThrottle(UserRateThrottle):
     """Custom rate throttle for search requests."""
@@ -121,6 +45,9 @@ class BookSearchAPIView(APIView):
     Supports filtering, pagination, and fallback to external APIs.
     """
     throttle_classes = [SearchRateThrottle]
+    # JSON only: browsers asking for text/html would otherwise get the
+    # browsable API page, which re-renders the whole payload into HTML
+    renderer_classes = [ORJSONRenderer]
     
     def _validate_search_params(self, request) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
         """
@@ -129,8 +56,11 @@ class BookSearchAPIView(APIView):
         If validation fails, returns (None, error_response).
         """
         try:
+            # One pass over the QueryDict; plain dict lookups from here on
+            query_params = request.GET.dict()
+            
             # Get query parameter
-            query = request.GET.get('q', '').strip()
+            query = query_params.get('q', '').strip()
             if not query:
                 return None, {
                     'error': 'Missing required parameter',
@@ -147,8 +77,8 @@ class BookSearchAPIView(APIView):
             
             # Get pagination parameters
             try:
-                page = max(1, int(request.GET.get('page', 1)))
-                page_size = min(max(1, int(request.GET.get('page_size', 10))), 50)
+                page = max(1, int(query_params.get('page', 1)))
+                page_size = min(max(1, int(query_params.get('page_size', 10))), 50)
             except ValueError:
                 return None, {
                     'error': 'Invalid pagination parameters',
@@ -160,9 +90,9 @@ class BookSearchAPIView(APIView):
             filters = {}
             
             # Genre filter
-            genres = request.GET.get('genres')
+            genres = query_params.get('genres')
             if genres:
-                genre_list = [genre.strip() for genre in genres.split(',') if genre.strip()]
+                genre_list = _split_csv(genres)
                 if not genre_list:
                     return None, {
                         'error': 'Invalid genre filter',
@@ -172,7 +102,7 @@ class BookSearchAPIView(APIView):
                 filters['genres'] = genre_list
             
             # Rating filter
-            min_rating = request.GET.get('min_rating')
+            min_rating = query_params.get('min_rating')
             if min_rating:
                 try:
                     rating = float(min_rating)
@@ -191,17 +121,17 @@ class BookSearchAPIView(APIView):
                     }
             
             # Publication date filters
-            pub_date_from = request.GET.get('pub_date_from')
+            pub_date_from = query_params.get('pub_date_from')
             if pub_date_from:
                 try:
-                    from_date = datetime.strptime(pub_date_from, '%Y-%m-%d')
-                    if from_date > datetime.now():
+                    from_date = date.fromisoformat(pub_date_from)
+                    if from_date > date.today():
                         return None, {
                             'error': 'Invalid publication date',
                             'message': 'Publication date cannot be in the future',
                             'status': status.HTTP_400_BAD_REQUEST
                         }
-                    filters['pub_date_from'] = pub_date_from
+                    filters['pub_date_from'] = from_date.isoformat()
                 except ValueError:
                     return None, {
                         'error': 'Invalid publication date format',
@@ -209,17 +139,17 @@ class BookSearchAPIView(APIView):
                         'status': status.HTTP_400_BAD_REQUEST
                     }
             
-            pub_date_to = request.GET.get('pub_date_to')
+            pub_date_to = query_params.get('pub_date_to')
             if pub_date_to:
                 try:
-                    to_date = datetime.strptime(pub_date_to, '%Y-%m-%d')
+                    to_date = date.fromisoformat(pub_date_to)
                     if pub_date_from and to_date < from_date:
                         return None, {
                             'error': 'Invalid date range',
                             'message': 'End date must be after start date',
                             'status': status.HTTP_400_BAD_REQUEST
                         }
-                    filters['pub_date_to'] = pub_date_to
+                    filters['pub_date_to'] = to_date.isoformat()
                 except ValueError:
                     return None, {
                         'error': 'Invalid publication date format',
@@ -228,9 +158,9 @@ class BookSearchAPIView(APIView):
                     }
             
             # Author filter
-            authors = request.GET.get('authors')
+            authors = query_params.get('authors')
             if authors:
-                author_list = [author.strip() for author in authors.split(',') if author.strip()]
+                author_list = _split_csv(authors)
                 if not author_list:
                     return None, {
                         'error': 'Invalid author filter',
@@ -240,7 +170,7 @@ class BookSearchAPIView(APIView):
                 filters['author'] = author_list
             
             # Number of pages filter
-            num_pages = request.GET.get('num_pages')
+            num_pages = query_params.get('num_pages')
             if num_pages:
                 try:
                     pages = int(num_pages)
@@ -263,7 +193,7 @@ class BookSearchAPIView(APIView):
                 'page': page,
                 'page_size': page_size,
                 'filters': filters,
-                'include_external': request.GET.get('include_external', 'false').lower() == 'true'
+                'include_external': query_params.get('include_external', '').lower() in TRUE_VALUES
             }, None
             
         except Exception as e:
@@ -330,34 +260,27 @@ class BookSearchAPIView(APIView):
                     status=error['status']
                 )
             
-            # Try to get from cache
+            # Serve from cache, or search once per key and cache the results
             cache_key = CacheManager.generate_cache_key(params)
-            cached_results = CacheManager.get_cached_results(cache_key)
-            
-            if cached_results:
-                books, total_count = cached_results
-            else:
-            # Search using the service
-                try:
-                    books, total_count = PostgreSQLSearchService.search_books(
+            try:
+                books, total_count = CacheManager.get_or_compute(
+                    cache_key,
+                    lambda: PostgreSQLSearchService.search_books(
                         query=params['query'],
                         page=params['page'],
                         page_size=params['page_size'],
                         filters=params['filters']
-                            )
-                    
-                    # Cache the results
-                    CacheManager.set_cached_results(cache_key, books, total_count)
-                    
-                except Exception as e:
-                    logger.error(f"Search service error: {e}", exc_info=True)
-                    return Response(
-                        {
-                            'error': 'Search service error',
-                            'message': 'An error occurred while searching. Please try again.'
-                        },
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR
                     )
+                )
+            except Exception as e:
+                logger.error(f"Search service error: {e}", exc_info=True)
+                return Response(
+                    {
+                        'error': 'Search service error',
+                        'message': 'An error occurred while searching. Please try again.'
+                    },
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
             
             # Validate search results
             is_valid, error = self._validate_search_results(books, total_count)
@@ -1,15 +1,35 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Q
+from django.contrib.postgres.search import TrigramDistance
+from django.core.cache import cache
+from django.db.models import Count, Exists, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.decorators import method_decorator
 from books.models import Book, Author
-from books.utils.search_service import PostgreSQLSearchService
+from books.utils.search_service import PostgreSQLSearchService, _cache_digest
+from books.utils.search_cache import CacheManager
+from books.views.views import cache_publicly
 from books.utils.external_api_clients import search_external_apis
 from books.utils.book_normalizer import BookNormalizer
 from books.logging_config import logger
 
+# Typeahead fires on every keystroke, so the same prefixes repeat constantly
+SUGGESTIONS_CACHE_TIMEOUT = 120
+# External results only top up local suggestions, so don't hold the request
+# for long; search_external_apis only caches answers from both APIs
+EXTERNAL_SUGGESTIONS_TIMEOUT = 3
 
 
+def _count_links(links):
+    """Row count of a correlated link queryset, 0 when it has no rows."""
+    return Coalesce(
+        Subquery(links.order_by().values('book_id').annotate(n=Count('*')).values('n')),
+        0,
+    )
+
+
+@method_decorator(cache_publicly, name='dispatch')
 class BookSuggestionAPIView(APIView):
     """
     API view for getting book title suggestions using PostgreSQL.
@@ -35,27 +55,28 @@ class BookSuggestionAPIView(APIView):
             
             # Get limit parameter
             try:
-                limit = min(int(request.GET.get('limit', 5)), 20)  # Max 20 suggestions
+                limit = max(1, min(int(request.GET.get('limit', 5)), 20))  # 1 to 20 suggestions
             except ValueError:
                 return Response(
                     {'error': 'Invalid limit parameter'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
+            # Cached per (prefix, limit); keys carry the search cache
+            # generation so book changes invalidate them too
+            cache_key = (
+                f"{CacheManager.CACHE_PREFIX}:suggestions:{CacheManager.get_generation()}:"
+                f"{limit}:{_cache_digest(query.lower())}"
+            )
+            response_data = cache.get(cache_key)
+            if response_data is not None:
+                return Response({**response_data, 'query': query}, status=status.HTTP_200_OK)
+            
             # Get suggestions
             suggestions = PostgreSQLSearchService.get_suggestions(query, limit)
             
             # Normalize suggestions
-            normalized_suggestions = []
-            for suggestion in suggestions:
-                normalized_suggestion = BookNormalizer.normalize(suggestion, 'database')
-                normalized_suggestions.append(normalized_suggestion)
-                
-                # Log each suggestion
-                author_names = ", ".join([author["name"] if isinstance(author, dict) else author 
-                                      for author in normalized_suggestion["authors"]])
-                genre_names = ", ".join(normalized_suggestion["genres"])
-                logger.info(f"Suggestion: '{normalized_suggestion['title']}' by {author_names} with genres: {genre_names}")
+            normalized_suggestions = BookNormalizer.normalize_many(suggestions, 'database')
             
             # Prepare response
             response_data = {
@@ -63,8 +84,9 @@ class BookSuggestionAPIView(APIView):
                 'suggestions': normalized_suggestions,
                 'count': len(normalized_suggestions)
             }
+            cache.set(cache_key, response_data, SUGGESTIONS_CACHE_TIMEOUT)
             
-            logger.info(f"Suggestions completed for query: '{query}', found {len(normalized_suggestions)} suggestions")
+            logger.info("Suggestions completed for query: '%s', found %d suggestions", query, len(normalized_suggestions))
             return Response(response_data, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -104,7 +126,7 @@ class RelatedBookSuggestionAPIView(APIView):
             
             # Get limit parameter
             try:
-                limit = min(int(request.GET.get('limit', 5)), 20)  # Max 20 suggestions
+                limit = max(1, min(int(request.GET.get('limit', 5)), 20))  # 1 to 20 suggestions
             except ValueError:
                 return Response(
                     {'error': 'Invalid limit parameter'},
@@ -115,11 +137,19 @@ class RelatedBookSuggestionAPIView(APIView):
             include_external = request.GET.get('include_external', 'false').lower() == 'true'
             
             # Find the reference book
+            # Its authors and genres are read several times below
+            reference_books = Book.objects.prefetch_related('authors', 'genres')
             reference_book = None
             if book_id:
-                reference_book = Book.objects.filter(isbn13=book_id).first()
+                reference_book = reference_books.filter(isbn13=book_id).first()
             elif title:
-                reference_book = Book.objects.filter(title__icontains=title).first()
+                # Exact title first (UPPER(title) b-tree); otherwise the closest
+                # substring or trigram match, both served by the trigram indexes
+                reference_book = reference_books.filter(title__iexact=title).first()
+                if reference_book is None:
+                    reference_book = reference_books.filter(
+                        Q(title__icontains=title) | Q(title__trigram_similar=title)
+                    ).order_by(TrigramDistance('title', title), 'isbn13').first()
             
             if not reference_book:
                 return Response(
@@ -127,34 +157,31 @@ class RelatedBookSuggestionAPIView(APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
+            # Read the reference book's authors and genres once; the rest of
+            # the view works from these lists
+            author_ids, author_names = [], []
+            for author in reference_book.authors.all():
+                author_ids.append(author.author_id)
+                author_names.append(author.name)
+            genres = list(reference_book.genres.all())
+            
             # Get local suggestions based on the reference book
-            local_suggestions = self._get_local_suggestions(reference_book, limit)
+            local_suggestions = self._get_local_suggestions(
+                reference_book, author_ids, [genre.pk for genre in genres], limit
+            )
             
             # Normalize local suggestions
-            normalized_local_suggestions = []
-            for suggestion in local_suggestions:
-                normalized_suggestion = BookNormalizer.normalize(suggestion, 'database')
-                normalized_local_suggestions.append(normalized_suggestion)
-                
-                # Log each suggestion
-                author_names = ", ".join([author["name"] if isinstance(author, dict) else author 
-                                      for author in normalized_suggestion["authors"]])
-                genre_names = ", ".join(normalized_suggestion["genres"])
-                logger.info(f"Local Suggestion: '{normalized_suggestion['title']}' by {author_names} with genres: {genre_names}")
+            normalized_local_suggestions = BookNormalizer.normalize_many(local_suggestions, 'database')
             
             # Get external suggestions if needed
             external_suggestions = []
             if include_external and len(local_suggestions) < limit:
-                # Get author names and genres from reference book
-                author_names = [author.name for author in reference_book.authors.all()]
-                genres = [genre.genre for genre in reference_book.genres.all()]
-                
                 # Construct query for external APIs
                 external_query = reference_book.title
                 if author_names:
                     external_query += f" {author_names[0]}"
                 if genres:
-                    external_query += f" {genres[0]}"
+                    external_query += f" {genres[0].name}"
                 
                 # Search external APIs
                 external_books = self._search_external_apis(external_query)
@@ -163,22 +190,20 @@ class RelatedBookSuggestionAPIView(APIView):
                 seen_isbns = {suggestion.get('isbn13') for suggestion in local_suggestions if suggestion.get('isbn13')}
                 seen_isbns.add(reference_book.isbn13)
                 
+                # Pick the books to add first, then normalize only those
+                needed = limit - len(normalized_local_suggestions)
+                picked_books = []
                 for book in external_books:
-                    if book.get('isbn13') and book.get('isbn13') not in seen_isbns:
-                        # Normalize external book
-                        normalized_book = BookNormalizer.normalize(book, book.get('source', 'external'))
-                        external_suggestions.append(normalized_book)
-                        seen_isbns.add(normalized_book.get('isbn13'))
-                        
-                        # Log external suggestion
-                        author_names = ", ".join([author["name"] if isinstance(author, dict) else author 
-                                              for author in normalized_book["authors"]])
-                        genre_names = ", ".join(normalized_book["genres"])
-                        logger.info(f"External Suggestion: '{normalized_book['title']}' by {author_names} from {normalized_book['source']} with genres: {genre_names}")
-                        
-                        # Stop if we have enough suggestions
-                        if len(normalized_local_suggestions) + len(external_suggestions) >= limit:
+                    isbn13 = book.get('isbn13')
+                    if isbn13 and isbn13 not in seen_isbns:
+                        seen_isbns.add(isbn13)
+                        picked_books.append(book)
+                        if len(picked_books) >= needed:
                             break
+                external_suggestions = [
+                    BookNormalizer.normalize(book, book.get('source', 'external'))
+                    for book in picked_books
+                ]
             
             # Combine suggestions
             combined_suggestions = normalized_local_suggestions + external_suggestions[:limit - len(normalized_local_suggestions)]
@@ -188,14 +213,14 @@ class RelatedBookSuggestionAPIView(APIView):
                 'reference_book': {
                     'isbn13': reference_book.isbn13,
                     'title': reference_book.title,
-                    'authors': [author.name for author in reference_book.authors.all()],
+                    'authors': author_names,
                 },
                 'suggestions': combined_suggestions,
                 'count': len(combined_suggestions),
                 'include_external': include_external
             }
             
-            logger.info(f"Related suggestions completed for book: '{reference_book.title}', found {len(combined_suggestions)} suggestions")
+            logger.info("Related suggestions completed for book: '%s', found %d suggestions", reference_book.title, len(combined_suggestions))
             return Response(response_data, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -205,48 +230,45 @@ class RelatedBookSuggestionAPIView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
-    def _get_local_suggestions(self, reference_book, limit):
+    def _get_local_suggestions(self, reference_book, author_ids, genre_ids, limit):
         """
         Get book suggestions from the local database based on a reference book.
-        Suggestions are based on matching authors and genres.
+        Suggestions are based on matching the given author and genre ids.
         """
         try:
-            # Get authors and genres from the reference book
-            author_ids = reference_book.authors.values_list('author_id', flat=True)
-            genres = reference_book.genres.values_list('genre', flat=True)
+            # The reference book's author and genre links, per candidate book
+            author_links = Book.authors.through.objects.filter(
+                book_id=OuterRef('pk'), author_id__in=author_ids
+            )
+            genre_links = Book.genres.through.objects.filter(
+                book_id=OuterRef('pk'), genre_id__in=genre_ids
+            )
             
             # Build query to find books with similar authors or genres
             query = Q()
             
             # Add author filter if we have authors
             if author_ids:
-                query |= Q(authors__author_id__in=author_ids)
+                query |= Exists(author_links)
             
             # Add genre filter if we have genres
-            if genres:
-                query |= Q(genres__name__in=genres)
-            
-            # Exclude the reference book itself
-            query &= ~Q(isbn13=reference_book.isbn13)
+            if genre_ids:
+                query |= Exists(genre_links)
             
-            # Get suggestions
-            suggestions = Book.objects.filter(query).distinct()
+            if not query:
+                return []
             
-            # Order by relevance (number of matching authors and genres)
-            suggestions = sorted(
-                suggestions,
-                key=lambda book: (
-                    # Count matching authors
-                    len(set(book.authors.values_list('author_id', flat=True)) & set(author_ids)) +
-                    # Count matching genres
-                    len(set(book.genres.values_list('genre', flat=True)) & set(genres))
-                ),
-                reverse=True
+            # Rank by relevance (number of matching authors and genres) in
+            # the same query. Counting each candidate's links in correlated
+            # subqueries avoids joining authors x genres and grouping
+            suggestions = (
+                Book.objects.filter(query)
+                .exclude(isbn13=reference_book.isbn13)
+                .annotate(relevance=_count_links(author_links) + _count_links(genre_links))
+                .order_by('-relevance', 'isbn13')
+                .prefetch_related('authors', 'genres')[:limit]
             )
             
-            # Limit results
-            suggestions = suggestions[:limit]
-            
             # Convert to dictionaries
             return [PostgreSQLSearchService._book_to_dict(book) for book in suggestions]
             
@@ -256,11 +278,13 @@ class RelatedBookSuggestionAPIView(APIView):
     
     def _search_external_apis(self, query):
         """
-        Search for books in external APIs.
+        Search for books in external APIs. search_external_apis queries the
+        providers concurrently under one deadline and caches the merged
+        results per query.
         """
         try:
             # Use the existing external API search function
-            external_books = search_external_apis(query, max_retries=2, timeout=15)
+            external_books = search_external_apis(query, max_retries=2, timeout=EXTERNAL_SUGGESTIONS_TIMEOUT)
             return external_books
         except Exception as e:
             logger.error(f"Error searching external APIs for suggestions: {e}")
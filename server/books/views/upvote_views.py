@@ -2,13 +2,22 @@ from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, Count
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, OuterRef, Q
 from django.contrib.auth import get_user_model
 from books.models import BookReview, ReviewUpvote
 from books.serializers.review_serializers import ReviewUpvoteSerializer, BookReviewSerializer
+from books.views.review_views import (
+    REVIEW_ORDERINGS, ReviewCursorPagination, int_query_param, with_review_relations,
+)
 
 User = get_user_model()
 
+MAX_TOP_REVIEWS = 100
+
+# Review columns the upvote endpoints read: the author check and the counter
+UPVOTE_REVIEW_FIELDS = ('review_id', 'user', 'upvotes_count')
+
 
 class ReviewUpvoteCreateAPIView(APIView):
     """
@@ -19,7 +28,7 @@ class ReviewUpvoteCreateAPIView(APIView):
     
     def post(self, request, review_id):
         try:
-            review = BookReview.objects.get(review_id=review_id)
+            review = BookReview.objects.only(*UPVOTE_REVIEW_FIELDS, 'review_text').get(review_id=review_id)
         except BookReview.DoesNotExist:
             return Response(
                 {'error': 'Review not found'}, 
@@ -27,21 +36,22 @@ class ReviewUpvoteCreateAPIView(APIView):
             )
         
         # Check if user is trying to upvote their own review
-        if review.user == request.user:
+        if review.user_id == request.user.pk:
             return Response(
                 {'error': 'You cannot upvote your own review'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Check if user has already upvoted this review
-        if ReviewUpvote.objects.filter(user=request.user, review=review).exists():
+        # Create the upvote; an existing one is caught by the unique
+        # (user, review) constraint instead of a separate lookup
+        try:
+            with transaction.atomic():
+                upvote = ReviewUpvote.objects.create(user=request.user, review=review)
+        except IntegrityError:
             return Response(
                 {'error': 'You have already upvoted this review'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        # Create the upvote
-        upvote = ReviewUpvote.objects.create(user=request.user, review=review)
         serializer = ReviewUpvoteSerializer(upvote, context={'request': request})
         
         return Response(
@@ -62,7 +72,7 @@ class ReviewUpvoteDeleteAPIView(APIView):
     
     def delete(self, request, review_id):
         try:
-            review = BookReview.objects.get(review_id=review_id)
+            review = BookReview.objects.only(*UPVOTE_REVIEW_FIELDS).get(review_id=review_id)
         except BookReview.DoesNotExist:
             return Response(
                 {'error': 'Review not found'}, 
@@ -73,9 +83,6 @@ class ReviewUpvoteDeleteAPIView(APIView):
             upvote = ReviewUpvote.objects.get(user=request.user, review=review)
             upvote.delete()
             
-            # Refresh review to get updated upvotes_count
-            review.refresh_from_db()
-            
             return Response(
                 {
                     'message': 'Upvote removed successfully',
@@ -100,7 +107,7 @@ class ReviewUpvoteToggleAPIView(APIView):
     
     def post(self, request, review_id):
         try:
-            review = BookReview.objects.get(review_id=review_id)
+            review = BookReview.objects.only(*UPVOTE_REVIEW_FIELDS).get(review_id=review_id)
         except BookReview.DoesNotExist:
             return Response(
                 {'error': 'Review not found'}, 
@@ -108,33 +115,13 @@ class ReviewUpvoteToggleAPIView(APIView):
             )
         
         # Check if user is trying to upvote their own review
-        if review.user == request.user:
+        if review.user_id == request.user.pk:
             return Response(
                 {'error': 'You cannot upvote your own review'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        try:
-            # Try to get existing upvote
-            upvote = ReviewUpvote.objects.get(user=request.user, review=review)
-            # If exists, remove it
-            upvote.delete()
-            review.refresh_from_db()
-            
-            return Response(
-                {
-                    'message': 'Upvote removed',
-                    'action': 'removed',
-                    'upvoted': False,
-                    'upvotes_count': review.upvotes_count
-                }, 
-                status=status.HTTP_200_OK
-            )
-        except ReviewUpvote.DoesNotExist:
-            # If doesn't exist, create it
-            upvote = ReviewUpvote.objects.create(user=request.user, review=review)
-            review.refresh_from_db()
-            
+        if ReviewUpvote.toggle(request.user, review):
             return Response(
                 {
                     'message': 'Review upvoted',
@@ -144,6 +131,16 @@ class ReviewUpvoteToggleAPIView(APIView):
                 }, 
                 status=status.HTTP_201_CREATED
             )
+        
+        return Response(
+            {
+                'message': 'Upvote removed',
+                'action': 'removed',
+                'upvoted': False,
+                'upvotes_count': review.upvotes_count
+            }, 
+            status=status.HTTP_200_OK
+        )
 
 
 class ReviewUpvoteStatusAPIView(APIView):
@@ -154,22 +151,19 @@ class ReviewUpvoteStatusAPIView(APIView):
     
     def get(self, request, review_id):
         try:
-            review = BookReview.objects.get(review_id=review_id)
+            review = BookReview.objects.only(*UPVOTE_REVIEW_FIELDS).annotate(
+                user_upvoted=Exists(ReviewUpvote.objects.filter(user=request.user, review=OuterRef('pk')))
+            ).get(review_id=review_id)
         except BookReview.DoesNotExist:
             return Response(
                 {'error': 'Review not found'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        has_upvoted = ReviewUpvote.objects.filter(
-            user=request.user, 
-            review=review
-        ).exists()
-        
         return Response(
             {
                 'review_id': review_id,
-                'has_upvoted': has_upvoted,
+                'has_upvoted': review.user_upvoted,
                 'upvotes_count': review.upvotes_count
             }, 
             status=status.HTTP_200_OK
@@ -182,28 +176,19 @@ class ReviewsByUpvotesAPIView(generics.ListAPIView):
     Supports filtering by book and ordering.
     """
     serializer_class = BookReviewSerializer
+    pagination_class = ReviewCursorPagination
     
     def get_queryset(self):
-        queryset = BookReview.objects.all()
+        queryset = with_review_relations(BookReview.objects.all(), self.request)
         
         # Filter by book if provided
         book_id = self.request.query_params.get('book_id')
         if book_id:
             queryset = queryset.filter(book__isbn13=book_id)
         
-        # Order by upvotes count (descending by default)
+        # Order by upvotes count (descending by default), newest first on ties
         order = self.request.query_params.get('order', 'desc')
-        if order == 'asc':
-            queryset = queryset.order_by('upvotes_count')
-        else:
-            queryset = queryset.order_by('-upvotes_count')
-        
-        return queryset
-    
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context['request'] = self.request
-        return context
+        return queryset.order_by(*REVIEW_ORDERINGS[('upvotes', 'asc' if order == 'asc' else 'desc')])
 
 
 class TopReviewsAPIView(generics.ListAPIView):
@@ -214,25 +199,22 @@ class TopReviewsAPIView(generics.ListAPIView):
     
     def get_queryset(self):
         # Get minimum upvotes threshold from query params (default: 1)
-        min_upvotes = int(self.request.query_params.get('min_upvotes', 1))
+        min_upvotes = int_query_param(self.request, 'min_upvotes', 1, 0)
         
-        # Get limit from query params (default: 10)
-        limit = int(self.request.query_params.get('limit', 10))
+        # Get limit from query params (default: 10, max: 100)
+        limit = int_query_param(self.request, 'limit', 10, 1, MAX_TOP_REVIEWS)
         
         # Filter by book if provided
         book_id = self.request.query_params.get('book_id')
         
-        queryset = BookReview.objects.filter(upvotes_count__gte=min_upvotes)
+        queryset = with_review_relations(
+            BookReview.objects.filter(upvotes_count__gte=min_upvotes), self.request
+        )
         
         if book_id:
             queryset = queryset.filter(book__isbn13=book_id)
         
         return queryset.order_by('-upvotes_count', '-created_at')[:limit]
-    
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context['request'] = self.request
-        return context
 
 
 class UserUpvotedReviewsAPIView(generics.ListAPIView):
@@ -243,16 +225,8 @@ class UserUpvotedReviewsAPIView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        # Get reviews that the current user has upvoted
-        upvoted_review_ids = ReviewUpvote.objects.filter(
-            user=self.request.user
-        ).values_list('review_id', flat=True)
-        
-        return BookReview.objects.filter(
-            review_id__in=upvoted_review_ids
-        ).order_by('-upvotes_count')
-    
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context['request'] = self.request
-        return context
\ No newline at end of file
+        # Reviews the current user has upvoted; (user, review) is unique, so
+        # joining the upvotes can't repeat a review
+        return with_review_relations(
+            BookReview.objects.filter(upvotes__user=self.request.user), self.request
+        ).order_by('-upvotes_count')
\ No newline at end of file
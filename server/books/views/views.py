@@ -7,11 +7,51 @@ from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticated, IsAdminUser 
 from django.db import models
+from django.db.models import Count
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import conditional_page
+from functools import wraps
 
+# Catalogue responses are the same for every user and change rarely
+PUBLIC_CACHE_MAX_AGE = 60
+PUBLIC_CACHE_STALE_WHILE_REVALIDATE = 300
 
+
+def cache_publicly(view_func):
+    """
+    Let browsers and shared caches reuse successful responses briefly, and
+    answer If-None-Match revalidations with a 304 from the content ETag.
+    """
+    @wraps(view_func)
+    def wrapper(*args, **kwargs):
+        response = view_func(*args, **kwargs)
+        # Errors are not worth pinning in a shared cache
+        if response.status_code == 200:
+            patch_cache_control(
+                response, public=True, max_age=PUBLIC_CACHE_MAX_AGE,
+                stale_while_revalidate=PUBLIC_CACHE_STALE_WHILE_REVALIDATE,
+            )
+        return response
+    return conditional_page(wrapper)
+
+
+def with_book_relations(queryset):
+    """
+    Prefetch the authors and genres BookSerializer lists and annotate the
+    review count it shows, so serializing books doesn't query per book.
+    """
+    # Meta.ordering is ignored on aggregated querysets, so restate it, with
+    # the key as a tie-breaker so paginated pages stay stable
+    return queryset.prefetch_related('authors', 'genres').annotate(
+        reviews_total=Count('reviews', distinct=True)
+    ).order_by(*Book._meta.ordering, 'isbn13')
+
+
+@method_decorator(cache_publicly, name='dispatch')
 class BookListAPIView(generics.ListAPIView):
     schema = AutoSchema()
-    queryset = Book.objects.all()
+    queryset = with_book_relations(Book.objects.all())
     serializer_class = BookSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = {
@@ -59,7 +99,7 @@ class BookListAPIView(generics.ListAPIView):
 
 class BookDetailAPIView(generics.RetrieveAPIView):
     schema = AutoSchema()
-    queryset = Book.objects.all()
+    queryset = with_book_relations(Book.objects.all())
     serializer_class = BookSerializer
 
 #PRIV
@@ -85,6 +125,7 @@ class BookCreateAPIView(generics.CreateAPIView):
 
 
 
+@method_decorator(cache_publicly, name='dispatch')
 class AuthorListAPIView(generics.ListAPIView):
     schema = AutoSchema()
     queryset = Author.objects.all()
@@ -141,7 +182,7 @@ class AuthorBookListAPIView(generics.ListAPIView):
     def get_queryset(self):
         author_id = self.kwargs.get('pk')
         author_name = self.kwargs.get('name')        
-        queryset = Book.objects.all().prefetch_related('authors')
+        queryset = with_book_relations(Book.objects.all())
         
         if author_id:
             queryset = queryset.filter(authors__author_id=author_id)
@@ -155,6 +196,7 @@ class AuthorBookListAPIView(generics.ListAPIView):
         return queryset
     
 
+@method_decorator(cache_publicly, name='dispatch')
 class GenreListAPIView(generics.ListAPIView):
     schema = AutoSchema()
     queryset = Genre.objects.all()
@@ -166,6 +208,7 @@ class GenreListAPIView(generics.ListAPIView):
     pagination_class = LimitOffsetPagination
 
 
+@method_decorator(cache_publicly, name='dispatch')
 class GenreBookListAPIView(generics.ListAPIView):
     """
     API endpoint that returns books filtered by genre(s).
@@ -187,7 +230,7 @@ class GenreBookListAPIView(generics.ListAPIView):
     def get_queryset(self):
         genre_name = self.kwargs.get('name')
         genre_id = self.kwargs.get('pk')
-        queryset = Book.objects.all().prefetch_related('genres')
+        queryset = with_book_relations(Book.objects.all())
         
         if genre_id:
             queryset = queryset.filter(genres__id=genre_id)
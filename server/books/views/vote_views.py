@@ -2,9 +2,32 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, F
+from django.db.models import Count, Q, F, OuterRef, Subquery
 from books.models import BookReview, ReviewVote
 from books.serializers.review_serializers import ReviewVoteSerializer, BookReviewSerializer
+from books.views.review_views import int_query_param, with_review_relations
+
+
+# Review columns the vote endpoints read: the author check and the counters
+VOTE_REVIEW_FIELDS = ('review_id', 'user', 'upvotes_count', 'downvotes_count')
+
+
+def vote_counts(review, previous=None, current=None):
+    """
+    The review's vote counts after the user's vote moved from `previous` to
+    `current` (either may be None), worked out from the counts loaded with
+    the review instead of reading it again.
+    """
+    counts = {'upvote': review.upvotes_count, 'downvote': review.downvotes_count}
+    if previous:
+        counts[previous] = max(counts[previous] - 1, 0)
+    if current:
+        counts[current] += 1
+    return {
+        'upvotes_count': counts['upvote'],
+        'downvotes_count': counts['downvote'],
+        'net_votes': counts['upvote'] - counts['downvote'],
+    }
 
 
 class ReviewVoteCreateAPIView(generics.CreateAPIView):
@@ -18,7 +41,7 @@ class ReviewVoteCreateAPIView(generics.CreateAPIView):
     permission_classes = [IsAuthenticated]
     
     def create(self, request, review_id):
-        review = get_object_or_404(BookReview, review_id=review_id)
+        review = get_object_or_404(BookReview.objects.only(*VOTE_REVIEW_FIELDS), review_id=review_id)
         vote_type = request.data.get('vote_type')
         
         if vote_type not in ['upvote', 'downvote']:
@@ -28,56 +51,33 @@ class ReviewVoteCreateAPIView(generics.CreateAPIView):
             )
         
         # Check if user is trying to vote on their own review
-        if review.user == request.user:
+        if review.user_id == request.user.pk:
             return Response(
                 {'error': 'You cannot vote on your own review'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Check if user has already voted on this review
-        existing_vote = ReviewVote.objects.filter(user=request.user, review=review).first()
-        
-        if existing_vote:
-            if existing_vote.vote_type == vote_type:
-                return Response(
-                    {'error': f'You have already {vote_type}d this review'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            else:
-                # Update existing vote
-                existing_vote.vote_type = vote_type
-                existing_vote.save()
-                review.refresh_from_db()
-                
-                return Response({
-                    'message': f'Vote updated to {vote_type}',
-                    'vote_type': vote_type,
-                    'upvotes_count': review.upvotes_count,
-                    'downvotes_count': review.downvotes_count,
-                    'net_votes': review.upvotes_count - review.downvotes_count
-                }, status=status.HTTP_200_OK)
+        previous = ReviewVote.cast(request.user, review, vote_type)
         
-        # Create new vote
-        vote_data = {
-            'user': request.user.id,
-            'review': review.review_id,
-            'vote_type': vote_type
-        }
+        if previous == vote_type:
+            return Response(
+                {'error': f'You have already {vote_type}d this review'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        serializer = self.get_serializer(data=vote_data)
-        if serializer.is_valid():
-            serializer.save()
-            review.refresh_from_db()
-            
+        if previous:
+            # Existing vote was updated
             return Response({
-                'message': f'Review {vote_type}d successfully',
+                'message': f'Vote updated to {vote_type}',
                 'vote_type': vote_type,
-                'upvotes_count': review.upvotes_count,
-                'downvotes_count': review.downvotes_count,
-                'net_votes': review.upvotes_count - review.downvotes_count
-            }, status=status.HTTP_201_CREATED)
+                **vote_counts(review, previous, vote_type)
+            }, status=status.HTTP_200_OK)
         
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'message': f'Review {vote_type}d successfully',
+            'vote_type': vote_type,
+            **vote_counts(review, current=vote_type)
+        }, status=status.HTTP_201_CREATED)
 
 
 class ReviewVoteDeleteAPIView(generics.DestroyAPIView):
@@ -89,19 +89,16 @@ class ReviewVoteDeleteAPIView(generics.DestroyAPIView):
     permission_classes = [IsAuthenticated]
     
     def delete(self, request, review_id):
-        review = get_object_or_404(BookReview, review_id=review_id)
+        review = get_object_or_404(BookReview.objects.only(*VOTE_REVIEW_FIELDS), review_id=review_id)
         
         try:
             vote = ReviewVote.objects.get(user=request.user, review=review)
             vote_type = vote.vote_type
             vote.delete()
-            review.refresh_from_db()
             
             return Response({
                 'message': f'{vote_type.capitalize()} removed successfully',
-                'upvotes_count': review.upvotes_count,
-                'downvotes_count': review.downvotes_count,
-                'net_votes': review.upvotes_count - review.downvotes_count
+                **vote_counts(review, previous=vote_type)
             }, status=status.HTTP_200_OK)
         
         except ReviewVote.DoesNotExist:
@@ -121,7 +118,7 @@ class ReviewVoteToggleAPIView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
     
     def post(self, request, review_id):
-        review = get_object_or_404(BookReview, review_id=review_id)
+        review = get_object_or_404(BookReview.objects.only(*VOTE_REVIEW_FIELDS), review_id=review_id)
         vote_type = request.data.get('vote_type')
         
         if vote_type not in ['upvote', 'downvote']:
@@ -131,56 +128,35 @@ class ReviewVoteToggleAPIView(generics.GenericAPIView):
             )
         
         # Check if user is trying to vote on their own review
-        if review.user == request.user:
+        if review.user_id == request.user.pk:
             return Response(
                 {'error': 'You cannot vote on your own review'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        existing_vote = ReviewVote.objects.filter(user=request.user, review=review).first()
+        previous = ReviewVote.toggle(request.user, review, vote_type)
         
-        if existing_vote:
-            if existing_vote.vote_type == vote_type:
-                # Remove the vote if it's the same type
-                existing_vote.delete()
-                review.refresh_from_db()
-                
-                return Response({
-                    'message': f'{vote_type.capitalize()} removed',
-                    'vote_type': None,
-                    'upvotes_count': review.upvotes_count,
-                    'downvotes_count': review.downvotes_count,
-                    'net_votes': review.upvotes_count - review.downvotes_count
-                }, status=status.HTTP_200_OK)
-            else:
-                # Change vote type
-                existing_vote.vote_type = vote_type
-                existing_vote.save()
-                review.refresh_from_db()
-                
-                return Response({
-                    'message': f'Vote changed to {vote_type}',
-                    'vote_type': vote_type,
-                    'upvotes_count': review.upvotes_count,
-                    'downvotes_count': review.downvotes_count,
-                    'net_votes': review.upvotes_count - review.downvotes_count
-                }, status=status.HTTP_200_OK)
-        else:
-            # Create new vote
-            ReviewVote.objects.create(
-                user=request.user,
-                review=review,
-                vote_type=vote_type
-            )
-            review.refresh_from_db()
-            
+        if previous == vote_type:
+            # Same type again removes the vote
+            return Response({
+                'message': f'{vote_type.capitalize()} removed',
+                'vote_type': None,
+                **vote_counts(review, previous=vote_type)
+            }, status=status.HTTP_200_OK)
+        
+        if previous:
+            # Change vote type
             return Response({
-                'message': f'Review {vote_type}d successfully',
+                'message': f'Vote changed to {vote_type}',
                 'vote_type': vote_type,
-                'upvotes_count': review.upvotes_count,
-                'downvotes_count': review.downvotes_count,
-                'net_votes': review.upvotes_count - review.downvotes_count
-            }, status=status.HTTP_201_CREATED)
+                **vote_counts(review, previous, vote_type)
+            }, status=status.HTTP_200_OK)
+        
+        return Response({
+            'message': f'Review {vote_type}d successfully',
+            'vote_type': vote_type,
+            **vote_counts(review, current=vote_type)
+        }, status=status.HTTP_201_CREATED)
 
 
 class ReviewVoteStatusAPIView(generics.RetrieveAPIView):
@@ -224,7 +200,7 @@ class ReviewsByVotesAPIView(generics.ListAPIView):
         order = self.request.query_params.get('order', 'desc')
         book_id = self.request.query_params.get('book_id')
         
-        queryset = BookReview.objects.all()
+        queryset = with_review_relations(BookReview.objects.all(), self.request)
         
         if book_id:
             queryset = queryset.filter(book__isbn13=book_id)
@@ -258,11 +234,6 @@ class ReviewsByVotesAPIView(generics.ListAPIView):
             sort_field = f'-{sort_field}'
         
         return queryset.order_by(sort_field)
-    
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context['request'] = self.request
-        return context
 
 
 class TopReviewsAPIView(generics.ListAPIView):
@@ -278,11 +249,11 @@ class TopReviewsAPIView(generics.ListAPIView):
     serializer_class = BookReviewSerializer
     
     def get_queryset(self):
-        limit = min(int(self.request.query_params.get('limit', 10)), 50)
-        min_votes = int(self.request.query_params.get('min_votes', 1))
+        limit = int_query_param(self.request, 'limit', 10, 1, 50)
+        min_votes = int_query_param(self.request, 'min_votes', 1, 0)
         book_id = self.request.query_params.get('book_id')
         
-        queryset = BookReview.objects.annotate(
+        queryset = with_review_relations(BookReview.objects.all(), self.request).annotate(
             net_votes=F('upvotes_count') - F('downvotes_count'),
             total_votes=F('upvotes_count') + F('downvotes_count')
         ).filter(
@@ -293,11 +264,6 @@ class TopReviewsAPIView(generics.ListAPIView):
             queryset = queryset.filter(book__isbn13=book_id)
         
         return queryset.order_by('-net_votes', '-total_votes')[:limit]
-    
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context['request'] = self.request
-        return context
 
 
 class UserVotedReviewsAPIView(generics.ListAPIView):
@@ -314,21 +280,15 @@ class UserVotedReviewsAPIView(generics.ListAPIView):
     def get_queryset(self):
         vote_type = self.request.query_params.get('vote_type', 'all')
         
-        user_votes = ReviewVote.objects.filter(user=self.request.user)
-        
+        # Join the user's votes directly; (user, review) is unique, so no
+        # review comes back twice
+        vote_filter = {'votes__user': self.request.user}
         if vote_type in ['upvote', 'downvote']:
-            user_votes = user_votes.filter(vote_type=vote_type)
-        
-        review_ids = user_votes.values_list('review_id', flat=True)
+            vote_filter['votes__vote_type'] = vote_type
         
-        return BookReview.objects.filter(
-            review_id__in=review_ids
+        return with_review_relations(
+            BookReview.objects.filter(**vote_filter), self.request
         ).order_by('-created_at')
-    
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context['request'] = self.request
-        return context
 
 
 class ReviewVoteStatsAPIView(generics.RetrieveAPIView):
@@ -339,11 +299,24 @@ class ReviewVoteStatsAPIView(generics.RetrieveAPIView):
     """
     
     def get(self, request, review_id):
-        review = get_object_or_404(BookReview, review_id=review_id)
+        # Count the vote rows themselves (the stored counters can drift from
+        # them) with conditional aggregates in the same SELECT as the review
+        reviews = BookReview.objects.only('review_id').annotate(
+            vote_upvotes=Count('votes', filter=Q(votes__vote_type='upvote')),
+            vote_downvotes=Count('votes', filter=Q(votes__vote_type='downvote')),
+        )
+        if request.user.is_authenticated:
+            reviews = reviews.annotate(
+                current_user_vote=Subquery(
+                    ReviewVote.objects.filter(
+                        review=OuterRef('pk'), user=request.user
+                    ).values('vote_type')[:1]
+                )
+            )
+        review = get_object_or_404(reviews, review_id=review_id)
         
-        # Get vote breakdown
-        upvotes = ReviewVote.objects.filter(review=review, vote_type='upvote').count()
-        downvotes = ReviewVote.objects.filter(review=review, vote_type='downvote').count()
+        upvotes = review.vote_upvotes
+        downvotes = review.vote_downvotes
         total_votes = upvotes + downvotes
         net_votes = upvotes - downvotes
         
@@ -351,11 +324,7 @@ class ReviewVoteStatsAPIView(generics.RetrieveAPIView):
         upvote_percentage = (upvotes / total_votes * 100) if total_votes > 0 else 0
         downvote_percentage = (downvotes / total_votes * 100) if total_votes > 0 else 0
         
-        # Get user's vote if authenticated
-        user_vote = None
-        if request.user.is_authenticated:
-            vote = ReviewVote.objects.filter(user=request.user, review=review).first()
-            user_vote = vote.vote_type if vote else None
+        user_vote = getattr(review, 'current_user_vote', None)
         
         return Response({
             'review_id': review.review_id,